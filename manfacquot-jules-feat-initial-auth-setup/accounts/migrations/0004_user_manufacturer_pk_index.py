@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-14 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_manufacturer_markup_factor'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('role', 'manufacturer')), fields=['id'], name='user_manuf_pk_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 import uuid
+from functools import cached_property
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 from django.utils import timezone
@@ -73,6 +74,11 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = 'Users' # To match the spec's table name
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Manufacturers only: serves the role-filtered pk lookups in the review views
+            # (reviewed-manufacturer checks) from a much smaller index than the pk.
+            models.Index(fields=['id'], condition=models.Q(role=UserRole.MANUFACTURER), name='user_manuf_pk_idx'),
+        ]
 
 class Manufacturer(models.Model):
     # user_id UUID PRIMARY KEY REFERENCES Users(id)
@@ -120,6 +126,12 @@ class Manufacturer(models.Model):
     def __str__(self):
         return f"{self.user.company_name or self.user.email}'s Manufacturer Profile"
 
+    @cached_property
+    def pricing_table(self):
+        """Pricing factors parsed into exact scaled integers, cached per profile version (see quotes.pricing)."""
+        from quotes.pricing import get_pricing_table # Avoid circular import
+        return get_pricing_table(self)
+
     class Meta:
         db_table = 'Manufacturers' # To match the spec's table name
         verbose_name = 'Manufacturer'
@@ -37,6 +37,14 @@ class Design(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True) # Good practice, though not in spec explicitly for this table
 
+    # Columns quotes.pricing.calculate_quote_price reads (updated_at is part of its cache key).
+    PRICING_FIELDS = ('id', 'customer_id', 'material', 'geometric_data', 'updated_at')
+
+    @classmethod
+    def pricing_qs(cls):
+        """Designs loaded with only the columns needed to price them."""
+        return cls.objects.only(*cls.PRICING_FIELDS)
+
     def __str__(self):
         return f"{self.design_name} (Customer: {self.customer.get_username()})" # Using get_username() for flexibility
 
@@ -1,5 +1,6 @@
 import uuid
 import boto3 # Import boto3
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
 from django.urls import reverse
 from rest_framework import status
@@ -13,7 +14,7 @@ from .models import Design, DesignStatus
 # but can be useful for understanding expected structures or for direct serializer tests.
 # from .serializers import DesignSerializer, DesignCreateSerializer # Can be useful for direct serializer tests
 from accounts.models import Manufacturer # For setting up manufacturer profiles
-from quotes.models import Quote # For checking if quotes are created
+from quotes.models import Quote, QuoteStatus # For checking if quotes are created
 
 # Mock boto3.session.Config if it's causing issues in tests or if not easily mockable via boto3.client patch
 # For example, if boto3.session.Config itself tries to load credentials.
@@ -472,104 +473,12 @@ class DesignAnalysisTaskTests(APITestCase):
         self.assertIn(f"Skipped: Design {self.design_processed.id} not in PENDING_ANALYSIS status", result_message)
         self.design_processed.refresh_from_db()
         self.assertEqual(self.design_processed.status, DesignStatus.ANALYSIS_COMPLETE)
-            email="taskuser@example.com", password="Password123!",
-            company_name="Task Test Corp", role=UserRole.CUSTOMER
-        )
-        self.design_pending = Design.objects.create(
-            customer=self.customer_user,
-            design_name="Design for Task Test",
-            s3_file_key=f"uploads/designs/{self.customer_user.id}/task_test.stl",
-            material="ABS", quantity=1, status=DesignStatus.PENDING_ANALYSIS
-        )
-        self.design_processed = Design.objects.create(
-            customer=self.customer_user,
-            design_name="Already Processed Design",
-            s3_file_key=f"uploads/designs/{self.customer_user.id}/processed.stl",
-            material="PLA", quantity=1, status=DesignStatus.ANALYSIS_COMPLETE
-        )
-
-    @patch('designs.tasks.boto3.client') # Patch where boto3.client is used in tasks.py
-    @patch('designs.tasks.mock_cad_analysis') # Patch our mock CAD analysis function
-    def test_analyze_cad_file_task_success(self, mock_analysis_func, mock_boto_client_constructor):
-        # Configure mock S3 client
-        mock_s3_instance = MagicMock()
-        mock_boto_client_constructor.return_value = mock_s3_instance
-
-        # Configure mock CAD analysis results
-        mock_analysis_results = {
-            "volume_cm3": 100.0, "bbox_mm": [10,20,30],
-            "surface_area_cm2": 600.0, "complexity_score": 0.5,
-            "analysis_engine": "mock_engine_v1.0_test"
-        }
-        mock_analysis_func.return_value = mock_analysis_results
-
-        # Run the task directly for testing (synchronously)
-        result_message = analyze_cad_file(self.design_pending.id)
-
-        self.design_pending.refresh_from_db()
-        self.assertEqual(self.design_pending.status, DesignStatus.ANALYSIS_COMPLETE)
-        self.assertEqual(self.design_pending.geometric_data, mock_analysis_results)
-        self.assertIn("Successfully processed", result_message)
-
-        mock_s3_instance.download_file.assert_called_once()
-        # args, kwargs = mock_s3_instance.download_file.call_args
-        # self.assertEqual(args[0], settings.AWS_STORAGE_BUCKET_NAME)
-        # self.assertEqual(args[1], self.design_pending.s3_file_key)
-
-        mock_analysis_func.assert_called_once()
-
-
-    @patch('designs.tasks.boto3.client')
-    @patch('designs.tasks.mock_cad_analysis') # Still need to patch it even if not called due to S3 error
-    def test_analyze_cad_file_task_s3_download_404(self, mock_analysis_func, mock_boto_client_constructor):
-        mock_s3_instance = MagicMock()
-        # Simulate S3 404 error
-        mock_s3_instance.download_file.side_effect = ClientError(
-            {'Error': {'Code': '404', 'Message': 'Not Found'}},
-            'download_file'
-        )
-        mock_boto_client_constructor.return_value = mock_s3_instance
-
-        result_message = analyze_cad_file(self.design_pending.id)
-
-        self.design_pending.refresh_from_db()
-        self.assertEqual(self.design_pending.status, DesignStatus.ANALYSIS_FAILED)
-        self.assertIn("error", self.design_pending.geometric_data)
-        self.assertIn("S3 file not found", self.design_pending.geometric_data["error"])
-        self.assertIn("S3 file not found", result_message)
-        mock_analysis_func.assert_not_called() # Analysis should not run if download fails
-
-    @patch('designs.tasks.boto3.client')
-    @patch('designs.tasks.mock_cad_analysis')
-    def test_analyze_cad_file_task_analysis_failure(self, mock_analysis_func, mock_boto_client_constructor):
-        mock_s3_instance = MagicMock() # S3 download is successful
-        mock_boto_client_constructor.return_value = mock_s3_instance
-
-        # Simulate failure in the (mocked) CAD analysis step
-        mock_analysis_func.side_effect = ValueError("Simulated CAD processing error")
-
-        analyze_cad_file(self.design_pending.id)
-
-        self.design_pending.refresh_from_db()
-        self.assertEqual(self.design_pending.status, DesignStatus.ANALYSIS_FAILED)
-        self.assertIn("error", self.design_pending.geometric_data)
-        self.assertIn("Analysis failed: Simulated CAD processing error", self.design_pending.geometric_data["error"])
-
-    def test_analyze_cad_file_task_design_not_found(self):
-        non_existent_uuid = uuid.uuid4()
-        result_message = analyze_cad_file(non_existent_uuid)
-        self.assertIn(f"Failed: Design {non_existent_uuid} not found", result_message)
-
-    def test_analyze_cad_file_task_already_processed(self):
-        result_message = analyze_cad_file(self.design_processed.id)
-        self.assertIn(f"Skipped: Design {self.design_processed.id} not in PENDING_ANALYSIS status", result_message)
-        self.design_processed.refresh_from_db()
-        # Ensure status and data haven't changed
-        self.assertEqual(self.design_processed.status, DesignStatus.ANALYSIS_COMPLETE)
 
 
 # --- Test GenerateQuotesView API Endpoint ---
 class GenerateQuotesViewTests(APITestCase):
+    # Requests run inside captureOnCommitCallbacks(execute=True), so the compute_quote_price tasks the
+    # view dispatches on commit run (eagerly, see CELERY_TASK_ALWAYS_EAGER) before the assertions.
     def setUp(self):
         self.customer = User.objects.create_user(
             email="quotegen_cust@example.com", password="password", role=UserRole.CUSTOMER
@@ -641,13 +550,13 @@ class GenerateQuotesViewTests(APITestCase):
                 }
             }
         )
-        self.manufacturer4_user = User.objects.create_user( # ABS, small, explicitly NO CNC
-            email="quotegen_mf4@example.com", password="password", role=UserRole.MANUFACTURER, company_name="MF4 ABS Small NoCNC"
+        self.manufacturer4_user = User.objects.create_user( # ABS, small, CNC capable
+            email="quotegen_mf4@example.com", password="password", role=UserRole.MANUFACTURER, company_name="MF4 ABS Small"
         )
         self.manufacturer4_profile = Manufacturer.objects.create(
             user=self.manufacturer4_user, markup_factor="1.22",
             capabilities={
-                "materials_supported": ["ABS"], "max_size_mm": [50, 50, 50], "cnc": False,
+                "materials_supported": ["ABS"], "max_size_mm": [50, 50, 50], "cnc": True,
                 "pricing_factors": {
                     "material_properties": {"ABS": {"density_g_cm3": 1.04, "cost_usd_kg": 28.0}},
                     "machining": {"base_time_cost_unit": "15.0", "time_multiplier_complexity_cost_unit": "60.0"},
@@ -670,13 +579,16 @@ class GenerateQuotesViewTests(APITestCase):
     def test_generate_quotes_success(self):
         self._login(self.customer) # Design owner triggers
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         self.assertIn("generated_quotes", response.data)
         # MF1 and MF4 should be able to quote this ABS design.
         self.assertEqual(len(response.data["generated_quotes"]), 2)
-        self.assertEqual(response.data["message"], f"2 quote(s) generated successfully for design '{self.design_analyzed.design_name}'.")
+        self.assertEqual(response.data["message"], f"2 quote(s) queued for pricing for design '{self.design_analyzed.design_name}'.")
+        # Quotes are returned as placeholders; pricing happens in quotes.tasks.compute_quote_price.
+        self.assertTrue(all(q['status'] == QuoteStatus.CALCULATING for q in response.data["generated_quotes"]))
 
         self.design_analyzed.refresh_from_db()
         self.assertEqual(self.design_analyzed.status, DesignStatus.QUOTED)
@@ -691,18 +603,37 @@ class GenerateQuotesViewTests(APITestCase):
         # Expected for MF1: MatCost = 50*1.04*(25/1000) = 1.3. MachineCost = 10 + (0.8*50) = 50. TotalBeforeMarkup = 51.3. Total = 51.3*1.2 = 61.56
         self.assertEqual(float(quote_mf1.price_usd), 61.56)
         self.assertEqual(quote_mf1.estimated_lead_time_days, 5)
+        self.assertEqual(quote_mf1.status, QuoteStatus.PENDING)
+
+    def test_generate_quotes_returns_calculating_placeholders(self):
+        self._login(self.customer)
+        url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
+        # No on-commit callbacks run here, so pricing has not happened yet.
+        response = self.client.post(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        quotes = Quote.objects.filter(design=self.design_analyzed)
+        self.assertEqual(quotes.count(), 2)
+        self.assertTrue(all(q.status == QuoteStatus.CALCULATING and q.price_usd is None for q in quotes))
+        self.assertEqual(
+            {q['manufacturer_display_name'] for q in response.data["generated_quotes"]}, {"MF1 Pricing", "MF4 ABS Small"}
+        )
+        self.design_analyzed.refresh_from_db()
+        self.assertEqual(self.design_analyzed.status, DesignStatus.ANALYSIS_COMPLETE) # Moves to QUOTED once priced
 
     def test_generate_quotes_design_not_analyzed(self):
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_pending.id})
-        response = self.client.post(url, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn(f"Design must be in '{DesignStatus.ANALYSIS_COMPLETE.label}' status", response.data['error'])
 
     def test_generate_quotes_design_no_geometric_data(self):
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_no_geom.id})
-        response = self.client.post(url, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("Design geometric data is missing", response.data['error'])
 
@@ -710,7 +641,8 @@ class GenerateQuotesViewTests(APITestCase):
         other_customer = User.objects.create_user(email="other@example.com", password="pw", role=UserRole.CUSTOMER)
         self._login(other_customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN) # IsOwnerOrAdmin permission
 
     def test_generate_quotes_manufacturer_is_owner(self):
@@ -722,8 +654,9 @@ class GenerateQuotesViewTests(APITestCase):
         )
         self._login(self.manufacturer1_user) # Logged in as owner
         url = reverse('design_generate_quotes', kwargs={'id': mf1_design.id})
-        response = self.client.post(url, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         # Design is PLA. MF1 (owner) skipped.
         # MF2 (PLA, size [150,150,150]) - should quote for bbox [10,10,10].
         # MF3 (PLA, size [200,200,200]) - should quote.
@@ -744,21 +677,45 @@ class GenerateQuotesViewTests(APITestCase):
             price_usd="100.00", estimated_lead_time_days=10
         )
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
 
-        # MF1 already quoted. MF2 cannot make ABS, so its pricing will fail.
-        # Thus, 0 new quotes generated, and there's an error for MF2.
         # MF1 already quoted. MF2 (PLA only) & MF3 (PLA only) cannot quote ABS. MF4 (ABS, size [50,50,50]) can.
         # So, 1 new quote from MF4 is expected.
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         self.assertEqual(len(response.data.get("generated_quotes", [])), 1)
         self.assertEqual(response.data["generated_quotes"][0]['manufacturer'], self.manufacturer4_user.id)
-        self.assertIn("1 quote(s) generated successfully", response.data["message"])
+        self.assertIn("1 quote(s) queued for pricing", response.data["message"])
 
         self.design_analyzed.refresh_from_db()
         # Status should change to QUOTED as one new quote was made.
         self.assertEqual(self.design_analyzed.status, DesignStatus.QUOTED)
 
+    def test_generate_quotes_concurrent_quote_only_skips_that_manufacturer(self):
+        # MF1 quotes manually after the view has read which manufacturers already quoted, so the
+        # batch INSERT hits uniq_quote_per_mf_per_design.
+        real_filter = Quote.objects.filter
+
+        def racing_filter(*args, **kwargs):
+            if 'status' in kwargs: # The failed-placeholder cleanup, not the already-quoted read
+                return real_filter(*args, **kwargs)
+            Quote.objects.create(
+                design=self.design_analyzed, manufacturer=self.manufacturer1_user,
+                price_usd="100.00", estimated_lead_time_days=10
+            )
+            return Quote.objects.none()
+
+        self._login(self.customer)
+        url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
+        with patch.object(Quote.objects, 'filter', side_effect=racing_filter):
+            response = self.client.post(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        self.assertEqual([q['manufacturer'] for q in response.data["generated_quotes"]], [self.manufacturer4_user.id])
+        self.assertEqual(Quote.objects.filter(design=self.design_analyzed).count(), 2)
+        manual_quote = Quote.objects.get(design=self.design_analyzed, manufacturer=self.manufacturer1_user)
+        self.assertEqual(manual_quote.status, QuoteStatus.PENDING)
+
     def test_generate_quotes_pricing_errors_for_some_manufacturers(self):
         # Design is ABS. Bbox is [50,40,30] from self.design_analyzed.
         # MF1: Supports ABS, size [200,200,200]. We make its ABS pricing invalid (missing density).
@@ -779,16 +736,17 @@ class GenerateQuotesViewTests(APITestCase):
 
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
-
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
-        self.assertIn("errors_by_manufacturer", response.data)
-        self.assertIn(str(self.manufacturer1_user.id), response.data["errors_by_manufacturer"]) # MF1 has pricing error
-        self.assertTrue(any("Density for material 'ABS' must be positive." in e for e in response.data["errors_by_manufacturer"][str(self.manufacturer1_user.id)]))
-        # MF2, MF3 are skipped by material. MF4 is skipped by size. So no errors reported for them, just no quotes.
-        self.assertNotIn(str(self.manufacturer2_user.id), response.data["errors_by_manufacturer"])
-        self.assertNotIn(str(self.manufacturer4_user.id), response.data["errors_by_manufacturer"])
-        self.assertEqual(Quote.objects.filter(design=self.design_analyzed).count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+
+        # MF1 passes the capability filters, so a placeholder is queued for it...
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        self.assertEqual([q['manufacturer'] for q in response.data["generated_quotes"]], [self.manufacturer1_user.id])
+        # ...but its pricing fails in the background task, which marks the placeholder failed.
+        # MF2, MF3 are skipped by material. MF4 is skipped by size. So no priced quotes exist.
+        quote = Quote.objects.get(design=self.design_analyzed)
+        self.assertEqual(quote.status, QuoteStatus.PRICING_FAILED)
+        self.assertIn("Density for material 'ABS' must be positive.", quote.notes)
 
         self.design_analyzed.refresh_from_db()
         self.assertEqual(self.design_analyzed.status, DesignStatus.ANALYSIS_COMPLETE)
@@ -797,13 +755,47 @@ class GenerateQuotesViewTests(APITestCase):
         # self.design_analyzed.geometric_data = original_design_geom
         # self.design_analyzed.save()
 
+    def test_generate_quotes_every_pricing_attempt_fails(self):
+        # Both ABS manufacturers pass the filters but have no usable ABS pricing.
+        for profile in (self.manufacturer1_profile, self.manufacturer4_profile):
+            profile.capabilities['pricing_factors']['material_properties']['ABS'] = {"density_g_cm3": 1.04, "cost_usd_kg": -1}
+            profile.save()
+
+        self._login(self.customer)
+        url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        self.assertEqual(len(response.data["generated_quotes"]), 2)
+
+        # Every placeholder the client was handed is still listed, with the reason it failed.
+        listed = self.client.get(reverse('design_quote_list_create', kwargs={'design_id': self.design_analyzed.id})).data['results']
+        self.assertEqual({q['id'] for q in listed}, {q['id'] for q in response.data["generated_quotes"]})
+        self.assertTrue(all(q['status'] == QuoteStatus.PRICING_FAILED for q in listed))
+        self.assertTrue(all(q['notes'] == "Automated pricing failed: Cost per kg for material 'ABS' must be non-negative." for q in listed))
+        self.design_analyzed.refresh_from_db()
+        self.assertEqual(self.design_analyzed.status, DesignStatus.ANALYSIS_COMPLETE) # Can still be quoted
+
+        # Once a manufacturer fixes its pricing, generating again retries its failed quote.
+        self.manufacturer1_profile.capabilities['pricing_factors']['material_properties']['ABS'] = {"density_g_cm3": 1.04, "cost_usd_kg": 25.0}
+        self.manufacturer1_profile.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        self.assertEqual(len(response.data["generated_quotes"]), 2)
+        quote_mf1 = Quote.objects.get(design=self.design_analyzed, manufacturer=self.manufacturer1_user)
+        self.assertEqual(quote_mf1.status, QuoteStatus.PENDING)
+        self.assertEqual(quote_mf1.price_usd, Decimal("61.56"))
+        self.design_analyzed.refresh_from_db()
+        self.assertEqual(self.design_analyzed.status, DesignStatus.QUOTED)
+
     def test_generate_quotes_filter_by_material(self):
         # self.design_analyzed is "ABS". MF1 & MF4 support ABS. MF2 & MF3 support PLA.
-        # MF4 is too small. So only MF1 should quote.
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         # self.design_analyzed is "ABS". MF1 and MF4 support ABS and should fit.
         self.assertEqual(len(response.data["generated_quotes"]), 2)
         manufacturer_ids_quoted = {q['manufacturer'] for q in response.data["generated_quotes"]} # q['manufacturer'] is already a UUID
@@ -827,8 +819,9 @@ class GenerateQuotesViewTests(APITestCase):
 
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         self.assertEqual(len(response.data["generated_quotes"]), 2) # Both MF1 and MF4 should quote
         manufacturer_ids_quoted = {q['manufacturer'] for q in response.data["generated_quotes"]}
         self.assertIn(self.manufacturer1_user.id, manufacturer_ids_quoted)
@@ -843,8 +836,9 @@ class GenerateQuotesViewTests(APITestCase):
 
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         self.assertEqual(len(response.data["generated_quotes"]), 1) # Only MF1 quotes
         self.assertEqual(response.data["generated_quotes"][0]['manufacturer'], self.manufacturer1_user.id)
 
@@ -855,19 +849,24 @@ class GenerateQuotesViewTests(APITestCase):
 
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.data) # View returns 200 with message
         self.assertEqual(len(response.data.get("generated_quotes", [])), 0)
         self.assertIn("No manufacturers found matching", response.data["message"])
+        self.assertEqual(set(response.data), {"message", "generated_quotes"}) # Same keys as the 202 response
 
     def test_generate_quotes_filter_by_cnc_capability(self):
         # Design is ABS, bbox [50,40,30].
         # MF1: ABS, size [200,200,200], cnc: True -> Should quote
         # MF4: ABS, size [50,50,50], cnc: False -> Should be skipped by CNC filter
+        self.manufacturer4_profile.capabilities["cnc"] = False
+        self.manufacturer4_profile.save()
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': self.design_analyzed.id})
-        response = self.client.post(url, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         self.assertEqual(len(response.data["generated_quotes"]), 1)
         self.assertEqual(response.data["generated_quotes"][0]['manufacturer'], self.manufacturer1_user.id)
 
@@ -885,14 +884,17 @@ class GenerateQuotesViewTests(APITestCase):
 
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': design_perm_fit.id})
-        response = self.client.post(url, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
 
-        # MF1 (ABS, CNC=T), MF4(ABS, CNC=F) filtered by material.
+        # MF1 (PLA and ABS, CNC=T, size [200,200,200]) - should quote.
+        # MF4 (ABS only) - filtered by material.
         # MF2 (PLA, no CNC specified -> passes CNC filter, size [150,150,150]) - should quote.
         # MF3 (PLA, CNC=T, size [200,200,200]) - should quote.
-        self.assertEqual(len(response.data["generated_quotes"]), 2)
+        self.assertEqual(len(response.data["generated_quotes"]), 3)
         quoted_mf_ids = {q['manufacturer'] for q in response.data["generated_quotes"]}
+        self.assertIn(self.manufacturer1_user.id, quoted_mf_ids)
         self.assertIn(self.manufacturer2_user.id, quoted_mf_ids)
         self.assertIn(self.manufacturer3_user.id, quoted_mf_ids)
 
@@ -912,10 +914,11 @@ class GenerateQuotesViewTests(APITestCase):
 
         self._login(self.customer)
         url = reverse('design_generate_quotes', kwargs={'id': design_perm_no_fit.id})
-        response = self.client.post(url, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
-        # MF1 (ABS), MF4(ABS) - filtered by material.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+        # MF4 (ABS) - filtered by material.
         # MF2 (PLA, size [100,100,100]) - should NOT quote.
-        # MF3 (PLA, size [200,200,200]) - should quote.
-        self.assertEqual(len(response.data["generated_quotes"]), 1)
-        self.assertEqual(response.data["generated_quotes"][0]['manufacturer'], self.manufacturer3_user.id)
+        # MF1 (PLA and ABS, size [200,200,200]) and MF3 (PLA, size [200,200,200]) - should quote.
+        quoted_mf_ids = {q['manufacturer'] for q in response.data["generated_quotes"]}
+        self.assertEqual(quoted_mf_ids, {self.manufacturer1_user.id, self.manufacturer3_user.id})
@@ -189,18 +189,20 @@ class DesignDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # --- Automated Quote Generation ---
+from functools import partial
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from accounts.models import Manufacturer # Import Manufacturer model
-from quotes.models import Quote # Import Quote model
+from quotes.models import Quote, QuoteStatus # Import Quote model
 from quotes.serializers import QuoteSerializer # To serialize generated quotes
-from quotes.pricing import calculate_quote_price # The pricing logic
+from quotes.tasks import compute_quote_price # Prices each quote in the background
 from .models import DesignStatus as DesignModelStatus # Alias to avoid clash with DRF status
 
 class GenerateQuotesView(APIView):
     """
     POST /api/designs/{id}/generate-quotes
     Triggers automated quote generation for a given design from all suitable manufacturers.
+    Quotes are created in CALCULATING status and priced asynchronously by quotes.tasks.compute_quote_price.
     """
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin] # Only design owner or admin can trigger this
 
@@ -312,15 +314,22 @@ class GenerateQuotesView(APIView):
 
         if not eligible_manufacturers:
             return Response(
-                {"message": "No manufacturers found matching the design's material or size requirements.", "generated_quotes": [], "errors_by_manufacturer": {}},
+                {"message": "No manufacturers found matching the design's material or size requirements.", "generated_quotes": []},
                 status=status.HTTP_200_OK # Or 400 if this is considered a client-side setup issue
             )
 
-        generated_quotes = []
-        errors_by_manufacturer = {}
-        quotes_created_count = 0
+        # Earlier placeholders these manufacturers could not price are retried: drop them so they are queued again.
+        Quote.objects.filter(
+            design=design, manufacturer__in=[mf.user for mf in eligible_manufacturers], status=QuoteStatus.PRICING_FAILED
+        ).delete()
+        # One query for every manufacturer that has already quoted this design, instead of one per manufacturer.
+        already_quoted = set(
+            Quote.objects.filter(design=design, manufacturer__in=[mf.user for mf in eligible_manufacturers])
+            .values_list('manufacturer_id', flat=True)
+        )
 
         with transaction.atomic(): # Ensure all quotes are created or none if a critical error occurs
+            new_quotes = []
             for mf_profile in eligible_manufacturers: # Use the filtered list
                 # Skip if manufacturer is the design owner
                 if design.customer == mf_profile.user:
@@ -329,53 +338,50 @@ class GenerateQuotesView(APIView):
 
                 # Skip if manufacturer has already quoted this design (to avoid duplicates if endpoint is called multiple times)
                 # This might be too restrictive if quotes can be re-generated. Consider business logic.
-                if Quote.objects.filter(design=design, manufacturer=mf_profile.user).exists():
+                if mf_profile.user.id in already_quoted:
                     logger.info(f"Manufacturer {mf_profile.user.email} has already quoted design {design.id}. Skipping.")
                     continue
 
-                pricing_details = calculate_quote_price(design=design, manufacturer=mf_profile)
-
-                if pricing_details.price_usd is not None and not pricing_details.errors:
+                # Placeholders; compute_quote_price fills in price and lead time off the request thread.
+                new_quotes.append(Quote(
+                    design=design,
+                    manufacturer=mf_profile.user, # Link to the User model instance
+                    status=QuoteStatus.CALCULATING,
+                    # bulk_create() bypasses Quote.save(), which normally fills this in.
+                    manufacturer_display_name=mf_profile.user.company_name or mf_profile.user.email,
+                ))
+
+            # A single multi-row INSERT; ids are client-side uuid4 defaults, so they are known without RETURNING.
+            # It gets its own savepoint, so a failure doesn't mark the whole request transaction for rollback.
+            try:
+                with transaction.atomic():
+                    generated_quotes = Quote.objects.bulk_create(new_quotes, batch_size=500)
+            except IntegrityError:
+                # Another request (a manual quote, or a second generate-quotes call) quoted some of these
+                # manufacturers after already_quoted was read; uniq_quote_per_mf_per_design rejected the
+                # whole batch. Insert one by one so only the conflicting manufacturers are skipped.
+                generated_quotes = []
+                for quote in new_quotes:
                     try:
-                        quote = Quote.objects.create(
-                            design=design,
-                            manufacturer=mf_profile.user, # Link to the User model instance
-                            price_usd=pricing_details.price_usd,
-                            estimated_lead_time_days=pricing_details.estimated_lead_time_days,
-                            notes=f"Automated quote based on design analysis. Calculation details: {pricing_details.calculation_details}",
-                            # status defaults to PENDING
-                        )
+                        with transaction.atomic():
+                            quote.save(force_insert=True)
+                    except IntegrityError:
+                        logger.info(f"Manufacturer {quote.manufacturer.email} quoted design {design.id} concurrently. Skipping.")
+                    else:
                         generated_quotes.append(quote)
-                        quotes_created_count += 1
-                    except Exception as e: # Catch DB errors or other unexpected issues during Quote creation
-                        logger.error(f"Error creating Quote object for design {design.id}, mf {mf_profile.user.email}: {e}")
-                        errors_by_manufacturer[str(mf_profile.user.id)] = f"Error saving quote: {str(e)}"
-                else:
-                    logger.warning(f"Could not calculate price for design {design.id} by mf {mf_profile.user.email}. Errors: {pricing_details.errors}")
-                    errors_by_manufacturer[str(mf_profile.user.id)] = pricing_details.errors
 
-            # Update design status to QUOTED if at least one quote was generated successfully
-            if quotes_created_count > 0 and design.status == DesignModelStatus.ANALYSIS_COMPLETE:
-                design.status = DesignModelStatus.QUOTED
-                design.save(update_fields=['status', 'updated_at'])
-                logger.info(f"Design {design.id} status updated to QUOTED.")
+            for quote in generated_quotes:
+                # Only dispatch once the placeholders are committed, so the worker can see them.
+                transaction.on_commit(partial(compute_quote_price.delay, quote.id))
+            quotes_created_count = len(generated_quotes)
 
+            # The design moves to QUOTED once the first quote is priced (see quotes.tasks).
 
         serialized_quotes = QuoteSerializer(generated_quotes, many=True).data
         response_data = {
-            "message": f"{quotes_created_count} quote(s) generated successfully for design '{design.design_name}'.",
+            "message": f"{quotes_created_count} quote(s) queued for pricing for design '{design.design_name}'.",
             "generated_quotes": serialized_quotes,
         }
-        if errors_by_manufacturer:
-            response_data["errors_by_manufacturer"] = errors_by_manufacturer
-            # Consider if a partial success (some quotes generated, some failed) is 200 OK or 207 Multi-Status
-            # For now, if any quotes are made, return 200 with error details.
-            # If NO quotes could be made and there were errors, maybe return 400 or 500.
-            if quotes_created_count == 0:
-                 return Response({
-                    "message": "No quotes could be generated.",
-                    "errors_by_manufacturer": errors_by_manufacturer
-                 }, status=status.HTTP_400_BAD_REQUEST)
-
-
-        return Response(response_data, status=status.HTTP_200_OK)
+
+        # 202: quotes exist but are still CALCULATING; poll the design's quote list for prices.
+        return Response(response_data, status=status.HTTP_202_ACCEPTED)
@@ -214,6 +214,28 @@ AWS_S3_PRESIGNED_URL_EXPIRATION = 3600  # seconds (1 hour)
 AWS_S3_DESIGNS_UPLOAD_PREFIX = os.environ.get('AWS_S3_DESIGNS_UPLOAD_PREFIX','uploads/designs/')
 
 
+# Cache
+# Uses Redis when CACHE_REDIS_URL is set (e.g. redis://localhost:6379/1), otherwise a per-process
+# in-memory cache. Currently used to memoize automated quote prices (quotes.pricing).
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# How long (seconds) a computed quote price is reused for an unchanged design/manufacturer pair.
+QUOTE_PRICE_CACHE_TIMEOUT = int(os.environ.get('QUOTE_PRICE_CACHE_TIMEOUT', 600))
+
+
 # Celery Configuration Options
 # Using Redis as the broker, as per specification.
 # Ensure Redis server is running.
@@ -236,3 +258,5 @@ import sys
 if 'test' in sys.argv or 'pytest' in sys.argv:
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True # Makes task exceptions reraise
+    # Argon2 is deliberately slow; tests create many users and never need strong hashes.
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,20 @@
+"""
+Settings for running the test suite:
+
+    python manage.py test --keepdb --settings=gmqp_project.settings_test
+
+Unlike the `'test' in sys.argv` switch in settings.py, these apply however the tests are
+launched (pytest-django, IDE runners, ...).
+"""
+from .settings import *  # noqa: F401,F403
+
+# Run Celery tasks synchronously; no broker is needed.
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# Tests create many users and never need strong hashes.
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# SQLite test databases are in-memory by default, which --keepdb cannot reuse; with a file,
+# later runs only apply migrations that are new since the last run.
+DATABASES["default"]["TEST"] = {"NAME": BASE_DIR / "test_db.sqlite3"}
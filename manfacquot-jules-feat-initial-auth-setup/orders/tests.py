@@ -111,6 +111,17 @@ class OrderAPITests(APITestCase):
         self.assertIn(self.order1_c1_m1.id, order_ids_in_response)
         self.assertIn(self.order2_c2_m1.id, order_ids_in_response)
 
+    def test_list_orders_query_count(self):
+        self._login(self.manufacturer1)
+        url = reverse('order_list')
+        with self.assertNumQueries(2): # orders (joined quote/users) + one batched design query
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(
+            {item['design_info']['design_name'] for item in response.data},
+            {"Order Design 1", "Order Design 2"}
+        )
+
     def test_admin_list_all_orders(self):
         self._login(self.admin_user)
         url = reverse('order_list')
@@ -1,5 +1,7 @@
+from django.db.models import Prefetch
 from rest_framework import generics, permissions
 from .models import Order
+from designs.models import Design
 from .serializers import OrderSerializer
 from accounts.models import UserRole # To check user roles
 
@@ -32,11 +34,14 @@ class OrderListView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         # select_related is used to optimize queries by fetching related objects in a single DB hit.
+        # The design is prefetched instead: joining it would repeat its (potentially large)
+        # geometric_data JSON on every row, while OrderSerializer.design_info only needs a few columns.
         base_queryset = Order.objects.select_related(
-            'design',
             'accepted_quote',
             'customer', # User object for customer
             'manufacturer' # User object for manufacturer
+        ).prefetch_related(
+            Prefetch('design', queryset=Design.objects.only('id', 'design_name', 'material', 'quantity'))
         )
 
         if user.is_staff:
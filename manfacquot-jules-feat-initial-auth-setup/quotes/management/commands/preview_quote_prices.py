@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Manufacturer
+from designs.models import Design, DesignStatus
+from quotes.pricing import calculate_quote_price
+from quotes.pricing_bulk import build_factor_tables, price_design_bulk
+
+
+class Command(BaseCommand):
+    """
+    Prices designs against every manufacturer profile using the vectorized bulk path.
+    Read-only: prints the prices, does not create or modify Quote rows.
+
+    Usage:
+        python manage.py preview_quote_prices                # all ANALYSIS_COMPLETE designs
+        python manage.py preview_quote_prices <design_id> ... # specific designs
+        python manage.py preview_quote_prices --details      # plus each price's cost breakdown
+    """
+    help = "Prints bulk-calculated quote prices for designs against all manufacturers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('design_ids', nargs='*', help="Design IDs to price (defaults to all analyzed designs).")
+        parser.add_argument('--details', action='store_true', help="Also print the cost breakdown of each price.")
+
+    def handle(self, *args, **options):
+        design_ids = options['design_ids']
+        if design_ids:
+            designs = Design.objects.filter(pk__in=design_ids)
+        else:
+            designs = Design.objects.filter(status=DesignStatus.ANALYSIS_COMPLETE)
+
+        # Factor tables are built once and reused for every design.
+        tables = build_factor_tables(Manufacturer.objects.select_related('user'))
+
+        for design in designs.iterator():
+            self.stdout.write(f"Design {design.id} ({design.design_name}, {design.material}):")
+            for manufacturer, price_usd, lead_time_days in price_design_bulk(design, tables):
+                if price_usd is None:
+                    continue
+                self.stdout.write(f"  {manufacturer.user.email}: ${price_usd} / {lead_time_days} days")
+                if options['details']:
+                    calculation_details = calculate_quote_price(design, manufacturer, verbose=True).calculation_details
+                    self.stdout.write(f"    {json.dumps(calculation_details)}")
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-14 13:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0002_alter_design_status'),
+        ('quotes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['design', 'status'], name='idx_quotes_design_status'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['manufacturer', 'status', '-created_at'], name='idx_quotes_mfr_status_created'),
+        ),
+    ]
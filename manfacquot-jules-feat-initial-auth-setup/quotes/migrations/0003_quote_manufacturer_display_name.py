@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-14 13:39
+
+from django.db import migrations, models
+
+
+def backfill_manufacturer_display_name(apps, schema_editor):
+    Quote = apps.get_model('quotes', 'Quote')
+    User = apps.get_model('accounts', 'User')
+    manufacturer_ids = Quote.objects.values_list('manufacturer_id', flat=True).distinct()
+    for user in User.objects.filter(pk__in=manufacturer_ids).only('id', 'company_name', 'email'):
+        Quote.objects.filter(manufacturer_id=user.pk).update(
+            manufacturer_display_name=user.company_name or user.email
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('quotes', '0002_quote_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='manufacturer_display_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_manufacturer_display_name, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-14 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0003_quote_manufacturer_display_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quote',
+            name='estimated_lead_time_days',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='price_usd',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='quote',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('expired', 'Expired'), ('calculating', 'Calculating')], default='pending', max_length=11),
+        ),
+    ]
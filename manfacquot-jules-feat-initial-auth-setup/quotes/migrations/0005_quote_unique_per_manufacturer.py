@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-14 14:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0002_alter_design_status'),
+        ('quotes', '0004_quote_calculating_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='quote',
+            constraint=models.UniqueConstraint(fields=('design', 'manufacturer'), name='uniq_quote_per_mf_per_design'),
+        ),
+    ]
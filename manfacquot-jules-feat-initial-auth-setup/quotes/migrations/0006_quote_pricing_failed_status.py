@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0005_quote_unique_per_manufacturer'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quote',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('expired', 'Expired'), ('calculating', 'Calculating'), ('failed', 'Pricing Failed')], default='pending', max_length=11),
+        ),
+    ]
@@ -12,6 +12,16 @@ class QuoteStatus(models.TextChoices):
     ACCEPTED = 'accepted', _('Accepted')
     REJECTED = 'rejected', _('Rejected')
     EXPIRED = 'expired', _('Expired')
+    # Placeholder quote whose price is still being computed by quotes.tasks.compute_quote_price
+    CALCULATING = 'calculating', _('Calculating')
+    # Terminal state of a placeholder this manufacturer's pricing factors could not price; `notes` holds why
+    PRICING_FAILED = 'failed', _('Pricing Failed')
+
+class QuoteManager(models.Manager):
+    def get_queryset(self):
+        # Serializers show design_name and the manufacturer's display name for every quote,
+        # so join both ForeignKeys by default instead of issuing 2 extra queries per row.
+        return super().get_queryset().select_related('design', 'manufacturer')
 
 class Quote(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -31,19 +41,34 @@ class Quote(models.Model):
         limit_choices_to={'role': UserRole.MANUFACTURER}
     )
 
-    price_usd = models.DecimalField(max_digits=10, decimal_places=2)
-    estimated_lead_time_days = models.IntegerField()
+    # Null only while the quote is CALCULATING.
+    price_usd = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    estimated_lead_time_days = models.IntegerField(null=True)
 
     status = models.CharField(
-        max_length=10, # Longest value is 'accepted' (8 chars) or 'rejected' (8 chars)
+        max_length=11, # Longest value is 'calculating' (11 chars)
         choices=QuoteStatus.choices,
         default=QuoteStatus.PENDING,
     )
 
     notes = models.TextField(blank=True, null=True)
+
+    # Denormalized copy of the manufacturer's company name (or email if blank), so listing
+    # quotes doesn't need the manufacturer row. Kept in sync by save() and quotes.signals.
+    manufacturer_display_name = models.CharField(max_length=255, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = QuoteManager()
+
+    def save(self, *args, **kwargs):
+        # Refresh the display name whenever the manufacturer is already loaded, so this never
+        # costs an extra query; otherwise only fill it in if it has never been set.
+        if not self.manufacturer_display_name or Quote.manufacturer.is_cached(self):
+            self.manufacturer_display_name = self.manufacturer.company_name or self.manufacturer.email
+        super().save(*args, **kwargs)
+
     def __str__(self):
         # manufacturer.company_name might not exist if User model doesn't guarantee it.
         # Using manufacturer.email or a method on User model that provides a display name.
@@ -59,10 +84,16 @@ class Quote(models.Model):
         verbose_name_plural = 'Quotes'
         ordering = ['-created_at']
         # Django automatically creates indexes for ForeignKeys.
-        # If specific compound indexes are needed beyond single FK indexes:
-        # indexes = [
-        #     models.Index(fields=['design', 'manufacturer']),
-        # ]
         # The spec mentions idx_quotes_design_id and idx_quotes_manufacturer_id,
         # these are automatically created by Django for the ForeignKey fields.
-        pass
+        # Compound indexes for the common access patterns:
+        indexes = [
+            # "Pending quotes for this design", also used to reject a design's other pending quotes on accept
+            models.Index(fields=['design', 'status'], name='idx_quotes_design_status'),
+            # "Recent quotes by this manufacturer", served in index order without a sort
+            models.Index(fields=['manufacturer', 'status', '-created_at'], name='idx_quotes_mfr_status_created'),
+        ]
+        constraints = [
+            # One quote per manufacturer per design; enforced here rather than by a SELECT before each INSERT.
+            models.UniqueConstraint(fields=['design', 'manufacturer'], name='uniq_quote_per_mf_per_design'),
+        ]
@@ -1,119 +1,298 @@
 import logging
-from decimal import Decimal, ROUND_HALF_UP
+from dataclasses import dataclass
+from decimal import Decimal
+from threading import Lock
 
+from django.conf import settings
+from django.core.cache import cache
+
+# Log calls here use lazy %-style arguments and the manufacturer's pk (== its user id), so
+# pricing never formats a message that is filtered out or loads `manufacturer.user` just to log.
 logger = logging.getLogger(__name__)
 
 # Define a named tuple or dataclass for pricing result for clarity
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 PricingDetails = namedtuple('PricingDetails', ['price_usd', 'estimated_lead_time_days', 'calculation_details', 'errors'])
 
+# All pricing arithmetic is done on plain ints: every factor is kept exactly as a Scaled
+# (value == mantissa * 10**exponent), so products and sums never round and only the final
+# price is rounded (once, half-up) and turned into a Decimal.
+Scaled = namedtuple('Scaled', ['mantissa', 'exponent'])
+
+
+@dataclass(frozen=True, slots=True)
+class MaterialProps:
+    """Density (g/cm3) and cost (USD/kg) of one material, as exact Scaled values."""
+    density_g_cm3: Scaled
+    cost_usd_kg: Scaled
+
+
+@dataclass(frozen=True)
+class PricingTable:
+    """A manufacturer's pricing factors, pre-parsed into exact Scaled values."""
+    materials: dict # material name -> MaterialProps
+    base_time: Scaled
+    time_mult: Scaled
+    markup: Scaled
+    lead_days: int
+
+# Validated inputs for _compute(), all as Scaled values.
+_PricingParams = namedtuple('_PricingParams', ['volume_cm3', 'complexity_score', 'material', 'table'])
+
+
+def _as_decimal(value):
+    """Decimal view of a Decimal, int or numeric string, without a str() round-trip where avoidable."""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, str)):
+        return Decimal(value) # Strings (the preferred JSON form for money) are parsed exactly
+    return Decimal(str(value)) # Anything else, e.g. floats and numpy scalars, by their shortest repr
+
+
+def _to_scaled(value):
+    """Converts a JSON/model numeric value (int, float, Decimal or numeric string) to an exact Scaled."""
+    if isinstance(value, int):
+        return Scaled(value, 0)
+    decimal_value = _as_decimal(value)
+    exponent = decimal_value.as_tuple().exponent
+    return Scaled(int(decimal_value.scaleb(-exponent)), exponent)
+
+
+def _to_decimal(value):
+    """Exact Decimal of a Scaled value."""
+    return Decimal(value.mantissa).scaleb(value.exponent)
+
+
+def _mul(*factors):
+    mantissa, exponent = 1, 0
+    for factor in factors:
+        mantissa *= factor.mantissa
+        exponent += factor.exponent
+    return Scaled(mantissa, exponent)
+
+
+def _add(a, b):
+    # Bring both terms to the finer exponent; exact, since the other one only gains zeros.
+    if a.exponent > b.exponent:
+        a, b = b, a
+    return Scaled(a.mantissa + b.mantissa * 10 ** (b.exponent - a.exponent), a.exponent)
+
+
+def _round_cents(value):
+    """Rounds a non-negative Scaled value half-up to whole cents, in a single integer division."""
+    shift = value.exponent + 2
+    if shift >= 0:
+        return value.mantissa * 10 ** shift
+    divisor = 10 ** -shift
+    return (value.mantissa + divisor // 2) // divisor
+
+
+def _cents_to_float(value):
+    """Scaled value rounded half-up to cents, as a float (for calculation_details)."""
+    return _round_cents(value) / 100
 
-def calculate_quote_price(design, manufacturer):
+
+# cost_usd_kg / 1000 == cost per gram
+_PER_THOUSAND = Scaled(1, -3)
+
+
+def build_pricing_table(manufacturer):
     """
-    Calculates a price quote for a given design from a specific manufacturer.
+    Parses `manufacturer.capabilities['pricing_factors']` and `markup_factor` into a PricingTable.
+    Prefer `manufacturer.pricing_table`, which goes through get_pricing_table().
+    """
+    capabilities = manufacturer.capabilities or {}
+    pricing_factors = capabilities.get("pricing_factors", {})
+    machining_factors = pricing_factors.get("machining", {})
 
-    Args:
-        design (designs.models.Design): The design object with geometric_data and material.
-        manufacturer (accounts.models.Manufacturer): The manufacturer object with pricing factors.
+    materials = {
+        name: MaterialProps(_to_scaled(props.get("density_g_cm3", 0)), _to_scaled(props.get("cost_usd_kg", 0)))
+        for name, props in pricing_factors.get("material_properties", {}).items()
+    }
 
-    Returns:
-        PricingDetails: A named tuple containing price_usd, estimated_lead_time_days,
-                        calculation_details (dict for transparency), and errors (list of strings).
+    # For now, take lead time from manufacturer profile or use a default.
+    # Could also be calculated based on complexity, quantity etc. in a more advanced model.
+    lead_days = pricing_factors.get("estimated_lead_time_base_days", 7) # Default to 7 days if not specified
+    if not isinstance(lead_days, int) or lead_days < 0:
+        logger.warning("Invalid estimated_lead_time_base_days for manufacturer %s: %s. Defaulting to 7.", manufacturer.pk, lead_days)
+        lead_days = 7 # Fallback default
+
+    return PricingTable(
+        materials=materials,
+        # These are assumed to be in cost units or a generic unit that markup applies to.
+        base_time=_to_scaled(machining_factors.get("base_time_cost_unit", 0)),
+        time_mult=_to_scaled(machining_factors.get("time_multiplier_complexity_cost_unit", 0)),
+        markup=_to_scaled(manufacturer.markup_factor),
+        lead_days=lead_days,
+    )
+
+
+# (pk, updated_at timestamp) -> PricingTable, least recently used first. Only the key and
+# the parsed table are kept, never the Manufacturer instance they were built from.
+_PRICING_TABLE_CACHE_SIZE = 1024
+_pricing_tables = OrderedDict()
+_pricing_tables_lock = Lock()
+
+
+def get_pricing_table(manufacturer):
     """
-    errors = []
-    calculation_details = {}
+    Returns the PricingTable for `manufacturer`, shared across instances of the same profile
+    until it is saved again. Unsaved profiles are parsed directly.
+
+    The cache is keyed on `updated_at`, which only save() bumps: after a
+    `Manufacturer.objects.filter(...).update(...)` that changes capabilities or markup_factor,
+    also set `updated_at=timezone.now()` in the same update, or the old table keeps being served.
+    """
+    if manufacturer.pk is None or manufacturer.updated_at is None:
+        return build_pricing_table(manufacturer)
+    key = (manufacturer.pk, manufacturer.updated_at.timestamp())
+    with _pricing_tables_lock:
+        table = _pricing_tables.get(key)
+        if table is not None:
+            _pricing_tables.move_to_end(key)
+            return table
+    table = build_pricing_table(manufacturer) # Parsed outside the lock; a racing miss just parses twice
+    with _pricing_tables_lock:
+        _pricing_tables[key] = table
+        if len(_pricing_tables) > _PRICING_TABLE_CACHE_SIZE:
+            _pricing_tables.popitem(last=False)
+    return table
+
+
+def _validate(design, manufacturer):
+    """
+    Checks the design and the manufacturer's pricing factors.
 
-    # 1. Validate inputs
+    Returns:
+        tuple(_PricingParams or None, list of str): The parsed inputs, or None with the reasons
+                                                    the design cannot be priced.
+    """
     if not design.geometric_data:
-        errors.append("Design geometric data is missing or incomplete.")
-        return PricingDetails(None, None, calculation_details, errors)
+        return None, ["Design geometric data is missing or incomplete."]
 
-    volume_cm3 = Decimal(str(design.geometric_data.get("volume_cm3", 0)))
-    complexity_score = Decimal(str(design.geometric_data.get("complexity_score", 0)))
+    errors = []
+    volume_cm3 = _to_scaled(design.geometric_data.get("volume_cm3", 0))
+    complexity_score = _to_scaled(design.geometric_data.get("complexity_score", 0))
     design_material_name = design.material # e.g., "Al-6061"
 
-    if volume_cm3 <= 0:
+    if volume_cm3.mantissa <= 0:
         errors.append("Design volume must be a positive value.")
     # complexity_score can be 0 or positive.
 
-    capabilities = manufacturer.capabilities or {}
-    pricing_factors = capabilities.get("pricing_factors", {})
-    material_properties_map = pricing_factors.get("material_properties", {})
-    machining_factors = pricing_factors.get("machining", {})
+    # One lookup into the pre-parsed table instead of walking the capabilities JSON.
+    table = manufacturer.pricing_table
+    material = table.materials.get(design_material_name)
+    if material is None:
+        errors.append(f"Manufacturer does not have pricing information for material: {design_material_name}")
+    else:
+        if material.density_g_cm3.mantissa <= 0:
+            errors.append(f"Density for material '{design_material_name}' must be positive.")
+        if material.cost_usd_kg.mantissa < 0: # Cost can be 0 for some scenarios, but not negative
+            errors.append(f"Cost per kg for material '{design_material_name}' must be non-negative.")
 
-    manufacturer_markup = manufacturer.markup_factor # This is a Decimal
+    if table.base_time.mantissa < 0: errors.append("Base time cost unit cannot be negative.")
+    if table.time_mult.mantissa < 0: errors.append("Time multiplier cost unit cannot be negative.")
+    if table.markup.mantissa <= 0: # Should be caught by serializer validation too
+        errors.append("Manufacturer markup factor must be positive.")
 
-    # 2. Calculate Material Cost
-    material_cost = Decimal("0.00")
-    if design_material_name in material_properties_map:
-        props = material_properties_map[design_material_name]
-        density_g_cm3 = Decimal(str(props.get("density_g_cm3", 0)))
-        cost_usd_kg = Decimal(str(props.get("cost_usd_kg", 0)))
+    if errors:
+        return None, errors
+    return _PricingParams(volume_cm3, complexity_score, material, table), errors
 
-        if density_g_cm3 <= 0:
-            errors.append(f"Density for material '{design_material_name}' must be positive.")
-        if cost_usd_kg < 0: # Cost can be 0 for some scenarios, but not negative
-            errors.append(f"Cost per kg for material '{design_material_name}' must be non-negative.")
 
-        if not errors: # Proceed if no material property errors
-            # MaterialCost = volume_cm3 * density_g_cm3 * (cost_usd_kg / 1000)
-            # (cost_usd_kg / 1000) is cost_usd_g
-            cost_usd_g = cost_usd_kg / Decimal("1000.0")
-            material_cost = volume_cm3 * density_g_cm3 * cost_usd_g
-            calculation_details["material_volume_cm3"] = float(volume_cm3)
-            calculation_details["material_density_g_cm3"] = float(density_g_cm3)
-            calculation_details["material_cost_usd_kg"] = float(cost_usd_kg)
-            calculation_details["calculated_material_cost_usd"] = float(material_cost.quantize(Decimal("0.01"), ROUND_HALF_UP))
-    else:
-        errors.append(f"Manufacturer does not have pricing information for material: {design_material_name}")
+def _compute(params, verbose=False):
+    """
+    Prices validated inputs; only called once _validate() found no errors.
+    The per-step breakdown in calculation_details is only built when `verbose` is set.
+    """
+    volume_cm3, complexity_score, material, table = params
 
-    # 3. Calculate Machine Time Cost
+    # MaterialCost = volume_cm3 * density_g_cm3 * (cost_usd_kg / 1000)
+    material_cost = _mul(volume_cm3, material.density_g_cm3, material.cost_usd_kg, _PER_THOUSAND)
     # MachineTimeCost = base_time + (geometric_data.complexity_score * time_multiplier)
     # These are assumed to be in cost units or a generic unit that markup applies to.
-    base_time_cost_unit = Decimal(str(machining_factors.get("base_time_cost_unit", 0))) # e.g. direct cost or hours to be multiplied by a rate
-    time_multiplier_complexity_cost_unit = Decimal(str(machining_factors.get("time_multiplier_complexity_cost_unit", 0)))
+    machine_time_cost = _add(table.base_time, _mul(complexity_score, table.time_mult))
+    total_price_before_markup = _add(material_cost, machine_time_cost)
+    total_price = _mul(total_price_before_markup, table.markup)
 
-    # For a simpler model, if base_time and time_multiplier are direct cost components:
-    if base_time_cost_unit < 0: errors.append("Base time cost unit cannot be negative.")
-    if time_multiplier_complexity_cost_unit < 0: errors.append("Time multiplier cost unit cannot be negative.")
+    # Standard currency rounding (half-up, total_price is never negative) done on the exact
+    # product, then the only Decimal in the calculation is built for the DecimalField.
+    final_price_usd = Decimal(_round_cents(total_price)).scaleb(-2)
 
-    machine_time_cost = Decimal("0.00")
-    if not errors: # Proceed if no errors so far with base values
-        machine_time_cost = base_time_cost_unit + (complexity_score * time_multiplier_complexity_cost_unit)
-        calculation_details["machining_base_time_cost_unit"] = float(base_time_cost_unit)
-        calculation_details["design_complexity_score"] = float(complexity_score)
-        calculation_details["machining_time_multiplier_cost_unit"] = float(time_multiplier_complexity_cost_unit)
-        calculation_details["calculated_machine_time_cost_units"] = float(machine_time_cost.quantize(Decimal("0.01"), ROUND_HALF_UP))
+    if not verbose:
+        return PricingDetails(price_usd=final_price_usd, estimated_lead_time_days=table.lead_days, calculation_details={}, errors=[])
 
+    calculation_details = {
+        "material_volume_cm3": float(_to_decimal(volume_cm3)),
+        "material_density_g_cm3": float(_to_decimal(material.density_g_cm3)),
+        "material_cost_usd_kg": float(_to_decimal(material.cost_usd_kg)),
+        "calculated_material_cost_usd": _cents_to_float(material_cost),
+        "machining_base_time_cost_unit": float(_to_decimal(table.base_time)),
+        "design_complexity_score": float(_to_decimal(complexity_score)),
+        "machining_time_multiplier_cost_unit": float(_to_decimal(table.time_mult)),
+        "calculated_machine_time_cost_units": _cents_to_float(machine_time_cost),
+        "total_price_before_markup_usd": _cents_to_float(total_price_before_markup),
+        "manufacturer_markup_factor": float(_to_decimal(table.markup)),
+        "final_total_price_usd": float(final_price_usd),
+        "estimated_lead_time_days": table.lead_days,
+    }
+    return PricingDetails(price_usd=final_price_usd, estimated_lead_time_days=table.lead_days, calculation_details=calculation_details, errors=[])
 
-    # 4. Calculate Total Price
-    total_price_before_markup = material_cost + machine_time_cost
-    calculation_details["total_price_before_markup_usd"] = float(total_price_before_markup.quantize(Decimal("0.01"), ROUND_HALF_UP))
 
-    if manufacturer_markup <= 0: # Should be caught by serializer validation too
-        errors.append("Manufacturer markup factor must be positive.")
+def _price_cache_key(design, manufacturer, verbose=False):
+    """Cache key for a saved design/manufacturer pair; None if either is unsaved."""
+    if design.pk is None or design.updated_at is None or manufacturer.pk is None or manufacturer.updated_at is None:
+        return None
+    # Saving either object bumps its updated_at, so stale entries are simply never read again
+    # (QuerySet.update() does not; see get_pricing_table()).
+    key = f"quote:{design.pk}:{manufacturer.pk}:{design.updated_at.timestamp()}:{manufacturer.updated_at.timestamp()}"
+    return f"{key}:verbose" if verbose else key
 
-    total_price = Decimal("0.00")
-    if not errors:
-        total_price = total_price_before_markup * manufacturer_markup
-        calculation_details["manufacturer_markup_factor"] = float(manufacturer_markup)
-        final_price_usd = total_price.quantize(Decimal("0.01"), ROUND_HALF_UP) # Standard currency rounding
-        calculation_details["final_total_price_usd"] = float(final_price_usd)
-    else:
-        final_price_usd = None # Cannot calculate price if there are errors
 
-    # 5. Determine Estimated Lead Time
-    # For now, take from manufacturer profile or use a default.
-    # Could also be calculated based on complexity, quantity etc. in a more advanced model.
-    estimated_lead_time_days = pricing_factors.get("estimated_lead_time_base_days", 7) # Default to 7 days if not specified
-    if not isinstance(estimated_lead_time_days, int) or estimated_lead_time_days < 0:
-        logger.warning(f"Invalid estimated_lead_time_base_days for manufacturer {manufacturer.user.email}: {estimated_lead_time_days}. Defaulting to 7.")
-        estimated_lead_time_days = 7 # Fallback default
-    calculation_details["estimated_lead_time_days"] = estimated_lead_time_days
+def calculate_quote_price(design, manufacturer, verbose=False):
+    """
+    Calculates a price quote for a given design from a specific manufacturer.
+    Results for saved, unchanged design/manufacturer pairs are memoized in the default cache
+    for QUOTE_PRICE_CACHE_TIMEOUT seconds.
 
+    Args:
+        design (designs.models.Design): The design object with geometric_data and material.
+        manufacturer (accounts.models.Manufacturer): The manufacturer object with pricing factors.
+        verbose (bool): Also fill calculation_details with the cost breakdown (for debugging/previews).
+
+    Returns:
+        PricingDetails: A named tuple containing price_usd, estimated_lead_time_days,
+                        calculation_details (breakdown dict if verbose, otherwise empty), and errors (list of strings).
+    """
+    cache_key = _price_cache_key(design, manufacturer, verbose)
+    if cache_key is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            price_usd, estimated_lead_time_days, calculation_details, errors = cached
+            return PricingDetails(
+                price_usd=Decimal(price_usd) if price_usd is not None else None,
+                estimated_lead_time_days=estimated_lead_time_days,
+                calculation_details=calculation_details,
+                errors=errors,
+            )
+
+    params, errors = _validate(design, manufacturer)
     if errors:
-        logger.warning(f"Pricing calculation failed for Design {design.id} by Manufacturer {manufacturer.user.email}. Errors: {errors}")
-        return PricingDetails(price_usd=None, estimated_lead_time_days=None, calculation_details=calculation_details, errors=errors)
+        logger.warning("Pricing calculation failed for Design %s by Manufacturer %s. Errors: %s", design.pk, manufacturer.pk, errors)
+        pricing_details = PricingDetails(price_usd=None, estimated_lead_time_days=None, calculation_details={}, errors=errors)
+    else:
+        pricing_details = _compute(params, verbose)
+        logger.info(
+            "Pricing calculation successful for Design %s by Manufacturer %s. Price: %s, Lead Time: %s days.",
+            design.pk, manufacturer.pk, pricing_details.price_usd, pricing_details.estimated_lead_time_days,
+        )
 
-    logger.info(f"Pricing calculation successful for Design {design.id} by Manufacturer {manufacturer.user.email}. Price: {final_price_usd}, Lead Time: {estimated_lead_time_days} days.")
-    return PricingDetails(price_usd=final_price_usd, estimated_lead_time_days=estimated_lead_time_days, calculation_details=calculation_details, errors=[])
+    if cache_key is not None:
+        # Stored as plain builtins (price as a string) to keep the cached payload small and backend-agnostic.
+        cache.set(cache_key, (
+            str(pricing_details.price_usd) if pricing_details.price_usd is not None else None,
+            pricing_details.estimated_lead_time_days,
+            pricing_details.calculation_details,
+            pricing_details.errors,
+        ), settings.QUOTE_PRICE_CACHE_TIMEOUT)
+    return pricing_details
@@ -0,0 +1,159 @@
+import logging
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Mirrors the fallback used by quotes.pricing.calculate_quote_price.
+DEFAULT_LEAD_TIME_DAYS = 7
+
+# Decimal places the float totals are snapped to before the final cent rounding.
+PRICE_DECIMALS = 6
+CENT = Decimal("0.01")
+
+# Struct-of-Arrays view of N manufacturers' pricing factors. Every array has one slot per
+# manufacturer, in the order the manufacturers were passed to build_factor_tables().
+# `materials` maps material name -> (densities_g_cm3, costs_usd_kg); manufacturers that
+# have no pricing data for a material hold NaN in that material's arrays.
+FactorTables = namedtuple(
+    'FactorTables',
+    ['manufacturers', 'materials', 'base_time', 'time_mult', 'markups', 'lead_days']
+)
+
+
+def _as_float(value, default=np.nan):
+    """Converts a JSON numeric value (int, float or numeric string) to float, or `default`."""
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def build_factor_tables(manufacturers):
+    """
+    Pre-materializes the `capabilities['pricing_factors']` of several manufacturers into
+    float64 arrays, so the JSON is walked once per manufacturer rather than once per quote.
+
+    Args:
+        manufacturers (iterable of accounts.models.Manufacturer): Profiles to price against.
+
+    Returns:
+        FactorTables: Arrays indexed by manufacturer position.
+    """
+    manufacturers = list(manufacturers)
+    count = len(manufacturers)
+
+    base_time = np.zeros(count, dtype=np.float64)
+    time_mult = np.zeros(count, dtype=np.float64)
+    markups = np.empty(count, dtype=np.float64)
+    lead_days = np.full(count, DEFAULT_LEAD_TIME_DAYS, dtype=np.int64)
+    materials = {}
+
+    for index, manufacturer in enumerate(manufacturers):
+        capabilities = manufacturer.capabilities or {}
+        pricing_factors = capabilities.get("pricing_factors", {})
+        machining_factors = pricing_factors.get("machining", {})
+
+        # Missing machining factors count as 0, exactly like the scalar path.
+        base_time[index] = _as_float(machining_factors.get("base_time_cost_unit", 0))
+        time_mult[index] = _as_float(machining_factors.get("time_multiplier_complexity_cost_unit", 0))
+        markups[index] = _as_float(manufacturer.markup_factor)
+
+        lead_time = pricing_factors.get("estimated_lead_time_base_days", DEFAULT_LEAD_TIME_DAYS)
+        if isinstance(lead_time, int) and lead_time >= 0:
+            lead_days[index] = lead_time
+
+        for material_name, props in pricing_factors.get("material_properties", {}).items():
+            if material_name not in materials:
+                materials[material_name] = (
+                    np.full(count, np.nan, dtype=np.float64),
+                    np.full(count, np.nan, dtype=np.float64),
+                )
+            densities, costs = materials[material_name]
+            densities[index] = _as_float(props.get("density_g_cm3", 0))
+            costs[index] = _as_float(props.get("cost_usd_kg", 0))
+
+    return FactorTables(manufacturers, materials, base_time, time_mult, markups, lead_days)
+
+
+def calculate_quote_prices_bulk(volumes, complexities, densities, cost_kg, base_time, time_mult, markups, lead_days=None):
+    """
+    Vectorized counterpart of quotes.pricing.calculate_quote_price.
+
+    All arguments are array-likes that broadcast against each other (e.g. a scalar volume
+    against N manufacturers' factors). Rows that would fail validation in the scalar path
+    (non-positive volume/density/markup, negative costs, missing material data) get a NaN price.
+
+    Returns:
+        tuple(np.ndarray, np.ndarray): (prices_usd as float64 rounded to PRICE_DECIMALS places,
+                                        lead times in days as int64). Cent rounding is left to
+                                        price_design_bulk(), see below.
+    """
+    volumes = np.asarray(volumes, dtype=np.float64)
+    complexities = np.asarray(complexities, dtype=np.float64)
+    densities = np.asarray(densities, dtype=np.float64)
+    cost_kg = np.asarray(cost_kg, dtype=np.float64)
+    base_time = np.asarray(base_time, dtype=np.float64)
+    time_mult = np.asarray(time_mult, dtype=np.float64)
+    markups = np.asarray(markups, dtype=np.float64)
+
+    material_cost = volumes * densities * cost_kg * 1e-3
+    machine_cost = base_time + complexities * time_mult
+    total = (material_cost + machine_cost) * markups
+    # Binary floats keep many half-cent totals just below .5 (1.005 is 1.00499999...), so rounding to
+    # cents here would disagree with the scalar path. Snap to a few extra decimals instead; the
+    # float noise is far below that, and price_design_bulk() does the half-up to cents in Decimal.
+    prices = np.round(total, PRICE_DECIMALS)
+
+    # NaN compares False, so missing material data is rejected here as well.
+    valid = (
+        (volumes > 0) & (densities > 0) & (cost_kg >= 0)
+        & (base_time >= 0) & (time_mult >= 0) & (markups > 0)
+    )
+    prices = np.where(valid, prices, np.nan)
+
+    if lead_days is None:
+        lead_days = DEFAULT_LEAD_TIME_DAYS
+    leadtimes = np.broadcast_to(np.asarray(lead_days, dtype=np.int64), prices.shape)
+    return prices, leadtimes
+
+
+def price_design_bulk(design, tables):
+    """
+    Prices one design against every manufacturer in `tables`.
+
+    Args:
+        design (designs.models.Design): The design object with geometric_data and material.
+        tables (FactorTables): Output of build_factor_tables().
+
+    Returns:
+        list of (manufacturer, Decimal or None, int or None): One entry per manufacturer;
+        price and lead time are None where the design cannot be priced.
+    """
+    geometric_data = design.geometric_data or {}
+    volume_cm3 = _as_float(geometric_data.get("volume_cm3", 0), default=0.0)
+    complexity_score = _as_float(geometric_data.get("complexity_score", 0), default=0.0)
+
+    material_arrays = tables.materials.get(design.material)
+    if not geometric_data or material_arrays is None:
+        return [(manufacturer, None, None) for manufacturer in tables.manufacturers]
+
+    densities, costs = material_arrays
+    prices, leadtimes = calculate_quote_prices_bulk(
+        volume_cm3, complexity_score, densities, costs,
+        tables.base_time, tables.time_mult, tables.markups, tables.lead_days,
+    )
+
+    results = []
+    for manufacturer, price, lead_time in zip(tables.manufacturers, prices.tolist(), leadtimes.tolist()):
+        if np.isnan(price):
+            results.append((manufacturer, None, None))
+        else:
+            # repr() of the snapped float is its short decimal form, e.g. "1.005", so this
+            # quantize sees the same value and applies the same ROUND_HALF_UP as quotes.pricing.
+            results.append((manufacturer, Decimal(repr(price)).quantize(CENT, ROUND_HALF_UP), lead_time))
+    return results
@@ -3,19 +3,50 @@ from .models import Quote, QuoteStatus
 from designs.models import Design
 from accounts.models import User, UserRole # For validation and representation
 
+# Quote status labels resolved once, so status_display doesn't go through
+# get_status_display() and a lazy translation for every serialized row.
+_STATUS_DISPLAY = {value: str(label) for value, label in QuoteStatus.choices}
+
+# Status transitions allowed through the API, as (acting role, current status, new status).
+# Re-sending the current status is not a transition and always passes.
+# Raw string values, so lookups hash and compare plain strs rather than enum members.
+_ALLOWED_TRANSITIONS = frozenset({
+    (UserRole.CUSTOMER.value, QuoteStatus.PENDING.value, QuoteStatus.ACCEPTED.value),
+    (UserRole.CUSTOMER.value, QuoteStatus.PENDING.value, QuoteStatus.REJECTED.value),
+    (UserRole.MANUFACTURER.value, QuoteStatus.PENDING.value, QuoteStatus.EXPIRED.value),
+})
+
+class StatusDisplayField(serializers.Field):
+    """Read-only label for a QuoteStatus value."""
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return _STATUS_DISPLAY.get(value, value)
+
 class QuoteSerializer(serializers.ModelSerializer):
     # Display related object details rather than just PKs
     design_name = serializers.CharField(source='design.design_name', read_only=True)
     # manufacturer_company_name = serializers.CharField(source='manufacturer.company_name', read_only=True)
-    # To handle potential blank company_name for manufacturer:
-    manufacturer_display_name = serializers.SerializerMethodField(read_only=True)
+    # Denormalized on the Quote row (company_name, falling back to email when blank).
+    manufacturer_display_name = serializers.CharField(read_only=True)
 
-    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    status_display = StatusDisplayField(source='status')
 
     # Allow design and manufacturer to be set by ID on create/update
     # design = serializers.PrimaryKeyRelatedField(queryset=Design.objects.all()) # Simpler alternative
     # manufacturer = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(role=UserRole.MANUFACTURER))
 
+    # Relations this serializer reads when rendering or validating a quote (design_name and
+    # design.customer_id); the manufacturer is only needed by id and its name is denormalized.
+    EAGER_RELATIONS = ('design',)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Joins exactly the relations the serializer reads, replacing any select_related() already applied."""
+        return queryset.select_related(None).select_related(*cls.EAGER_RELATIONS)
+
     class Meta:
         model = Quote
         fields = [
@@ -38,10 +69,11 @@ class QuoteSerializer(serializers.ModelSerializer):
             'design', 'manufacturer' # Make these read-only as they are set by the view context
         ]
         # `status` can be updated, e.g., by customer accepting/rejecting or manufacturer.
-
-    def get_manufacturer_display_name(self, obj):
-        # Safely get company_name or fall back to email
-        return obj.manufacturer.company_name or obj.manufacturer.email
+        extra_kwargs = {
+            # Nullable on the model only for CALCULATING placeholders; manual quotes must be priced.
+            'price_usd': {'required': True, 'allow_null': False},
+            'estimated_lead_time_days': {'required': True, 'allow_null': False},
+        }
 
     def validate_manufacturer(self, value):
         """Ensure the manufacturer user has the 'manufacturer' role."""
@@ -68,10 +100,12 @@ class QuoteSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         design = data.get('design') or (self.instance.design if self.instance else None)
-        manufacturer_user = data.get('manufacturer') or (self.instance.manufacturer if self.instance else None)
+        # Only the manufacturer's id is needed, so the instance's manufacturer is never loaded.
+        manufacturer_user = data.get('manufacturer')
+        manufacturer_id = manufacturer_user.id if manufacturer_user else (self.instance.manufacturer_id if self.instance else None)
 
-        if design and manufacturer_user:
-            if design.customer == manufacturer_user:
+        if design and manufacturer_id:
+            if design.customer_id == manufacturer_id:
                 raise serializers.ValidationError("A manufacturer cannot create a quote for their own design.")
 
         # If creating (no instance), the view's perform_create will set the manufacturer.
@@ -89,21 +123,21 @@ class QuoteSerializer(serializers.ModelSerializer):
         #         raise serializers.ValidationError("Only manufacturers can create quotes.")
 
         # If updating status
-        if self.instance and 'status' in data:
+        if self.instance and 'status' in data and data['status'] != self.instance.status and request and request.user:
             current_status = self.instance.status
             new_status = data['status']
-            # Add logic for allowed status transitions based on user role (customer vs manufacturer)
-            # Example: Customer can change PENDING -> ACCEPTED/REJECTED
-            # Manufacturer might change PENDING -> EXPIRED (if system doesn't do it automatically)
-            if request and request.user:
-                if request.user == design.customer: # Customer is acting
-                    if current_status == QuoteStatus.PENDING and new_status not in [QuoteStatus.ACCEPTED, QuoteStatus.REJECTED]:
-                        raise serializers.ValidationError(f"Customer can only change status to Accepted or Rejected from Pending. Invalid transition to {new_status}.")
-                elif request.user == manufacturer_user: # Manufacturer is acting
-                    # Manufacturers typically don't change status after creation, except maybe to withdraw/expire manually
-                    if new_status != current_status and new_status != QuoteStatus.EXPIRED : # Example
-                         raise serializers.ValidationError(f"Manufacturer cannot change status to {new_status} this way.")
-                else: # Some other user
-                    raise serializers.ValidationError("You do not have permission to change the status of this quote.")
+            # Customer can change PENDING -> ACCEPTED/REJECTED; manufacturer PENDING -> EXPIRED
+            # (if the system doesn't do it automatically). See _ALLOWED_TRANSITIONS.
+            if request.user.id == design.customer_id: # Customer is acting
+                role = UserRole.CUSTOMER.value
+            elif request.user.id == manufacturer_id: # Manufacturer is acting
+                role = UserRole.MANUFACTURER.value
+            else: # Some other user
+                raise serializers.ValidationError("You do not have permission to change the status of this quote.")
+
+            if (role, str(current_status), str(new_status)) not in _ALLOWED_TRANSITIONS:
+                if role == UserRole.CUSTOMER:
+                    raise serializers.ValidationError(f"Customer can only change status to Accepted or Rejected from Pending. Invalid transition to {new_status}.")
+                raise serializers.ValidationError(f"Manufacturer cannot change status to {new_status} this way.")
 
         return data
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from accounts.models import UserRole
+from .models import Quote
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_quote_manufacturer_display_name(sender, instance, created, **kwargs):
+    """
+    Keeps Quote.manufacturer_display_name in step with the manufacturer's company name/email.
+    company_name lives on the User, not on the Manufacturer profile, so this listens on User saves.
+    """
+    if created or instance.role != UserRole.MANUFACTURER:
+        return # A brand-new user has no quotes yet
+    display_name = instance.company_name or instance.email
+    Quote.objects.filter(manufacturer=instance).exclude(
+        manufacturer_display_name=display_name
+    ).update(manufacturer_display_name=display_name)
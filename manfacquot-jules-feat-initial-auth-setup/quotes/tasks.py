@@ -0,0 +1,75 @@
+import logging
+
+from celery import shared_task
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from accounts.models import Manufacturer
+from designs.models import Design, DesignStatus
+from .models import Quote, QuoteStatus
+from .pricing import calculate_quote_price
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def compute_quote_price(quote_id):
+    """
+    Prices a CALCULATING placeholder quote created by GenerateQuotesView.
+    On success the quote becomes PENDING and its design QUOTED; if the design cannot be
+    priced by this manufacturer, the quote becomes PRICING_FAILED with the reasons in `notes`,
+    and the design is left as it is (generating quotes again retries failed ones).
+    """
+    logger.info("Celery Task: Computing price for Quote ID: %s", quote_id)
+    try:
+        # The design is fetched slim (pricing columns only) instead of through the default join.
+        quote = (
+            Quote.objects.select_related(None)
+            .select_related('manufacturer__manufacturer_profile')
+            .prefetch_related(Prefetch('design', queryset=Design.pricing_qs()))
+            .get(pk=quote_id)
+        )
+    except Quote.DoesNotExist:
+        logger.warning("Quote ID %s no longer exists. Skipping pricing.", quote_id)
+        return f"Skipped: Quote {quote_id} not found."
+
+    if quote.status != QuoteStatus.CALCULATING:
+        logger.warning("Quote ID %s is not in CALCULATING status (current: %s). Skipping pricing.", quote_id, quote.status)
+        return f"Skipped: Quote {quote_id} not in CALCULATING status."
+
+    try:
+        manufacturer_profile = quote.manufacturer.manufacturer_profile
+    except Manufacturer.DoesNotExist:
+        errors = ["Manufacturer profile not found."]
+    else:
+        # The cost breakdown is not stored; `manage.py preview_quote_prices --details` shows it.
+        pricing_details = calculate_quote_price(design=quote.design, manufacturer=manufacturer_profile)
+        errors = pricing_details.errors
+
+    if errors:
+        logger.warning("Could not calculate price for design %s by mf %s. Errors: %s. Marking quote %s as failed.", quote.design_id, quote.manufacturer_id, errors, quote_id)
+        # Kept rather than deleted, so a client polling the placeholders it was given sees why.
+        Quote.objects.filter(pk=quote_id, status=QuoteStatus.CALCULATING).update(
+            status=QuoteStatus.PRICING_FAILED,
+            notes="Automated pricing failed: " + " ".join(errors),
+            updated_at=timezone.now(),
+        )
+        return f"Failed: Quote {quote_id} could not be priced."
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Conditional updates, so a quote withdrawn or re-processed meanwhile is left alone.
+        updated = Quote.objects.filter(pk=quote_id, status=QuoteStatus.CALCULATING).update(
+            price_usd=pricing_details.price_usd,
+            estimated_lead_time_days=pricing_details.estimated_lead_time_days,
+            notes="Automated quote based on design analysis.",
+            status=QuoteStatus.PENDING,
+            updated_at=now,
+        )
+        if updated:
+            Design.objects.filter(pk=quote.design_id, status=DesignStatus.ANALYSIS_COMPLETE).update(
+                status=DesignStatus.QUOTED, updated_at=now
+            )
+
+    logger.info("Quote ID %s priced at %s.", quote_id, pricing_details.price_usd)
+    return f"Success: Quote {quote_id} priced."
@@ -1,75 +1,102 @@
+import gc
+import random
 import uuid
+import weakref
+from decimal import Decimal, ROUND_HALF_UP
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 # from django.conf import settings # Not strictly needed for these tests yet
 
-from accounts.models import User, UserRole
+from accounts.models import Manufacturer, User, UserRole
 from designs.models import Design, DesignStatus as DesignModelStatus # Renamed to avoid clash
 from .models import Quote, QuoteStatus # Current app's models
+from .pricing import _to_decimal, calculate_quote_price
+from .pricing_bulk import build_factor_tables, price_design_bulk
+from .serializers import QuoteSerializer
+from .tasks import compute_quote_price
 
 class QuoteAPITests(APITestCase):
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
+        # Created once for the class; each test runs in a transaction that is rolled back, and
+        # Django hands every test its own deep copy of these instances, so tests may mutate them.
         # Customer 1 (Design Owner)
-        self.customer1 = User.objects.create_user(
+        cls.customer1 = User.objects.create_user(
             email="owner_quotes@example.com", password="Password123!", # Unique email
             company_name="Design Owner Inc.", role=UserRole.CUSTOMER
         )
         # Manufacturer 1 (Quote Creator)
-        self.manufacturer1 = User.objects.create_user(
+        cls.manufacturer1 = User.objects.create_user(
             email="mf1_quotes@example.com", password="Password123!", # Unique email
             company_name="Manuf One Corp", role=UserRole.MANUFACTURER
         )
         # Manufacturer 2 (Another Manufacturer)
-        self.manufacturer2 = User.objects.create_user(
+        cls.manufacturer2 = User.objects.create_user(
             email="mf2_quotes@example.com", password="Password123!", # Unique email
             company_name="Manuf Two Ltd", role=UserRole.MANUFACTURER
         )
         # Admin User
-        self.admin_user = User.objects.create_superuser( # Superuser is staff by default
+        cls.admin_user = User.objects.create_superuser( # Superuser is staff by default
             email="admin_quotes@example.com", password="Password123!", company_name="AdminQuoteCo"
         )
 
 
         # Design by Customer 1, ready for quotes
-        self.design_c1_analyzed = Design.objects.create(
-            customer=self.customer1, design_name="Analyzed Design C1 For Quotes", # Unique name
+        cls.design_c1_analyzed = Design.objects.create(
+            customer=cls.customer1, design_name="Analyzed Design C1 For Quotes", # Unique name
             s3_file_key="key_quotes1.stl", material="PLA", quantity=10,
             status=DesignModelStatus.ANALYSIS_COMPLETE,
             geometric_data={"volume_cm3": 100}
         )
 
         # Design by Customer 1, still pending analysis
-        self.design_c1_pending = Design.objects.create(
-            customer=self.customer1, design_name="Pending Design C1 For Quotes", # Unique name
+        cls.design_c1_pending = Design.objects.create(
+            customer=cls.customer1, design_name="Pending Design C1 For Quotes", # Unique name
             s3_file_key="key_quotes2.stl", material="ABS", quantity=5,
             status=DesignModelStatus.PENDING_ANALYSIS
         )
 
         # Quote by Manufacturer 1 for Customer 1's analyzed design
-        self.quote_mf1_design_c1 = Quote.objects.create(
-            design=self.design_c1_analyzed,
-            manufacturer=self.manufacturer1,
+        cls.quote_mf1_design_c1 = Quote.objects.create(
+            design=cls.design_c1_analyzed,
+            manufacturer=cls.manufacturer1,
             price_usd="150.00",
             estimated_lead_time_days=10,
             status=QuoteStatus.PENDING
         )
 
-    def _login(self, user_obj):
+        # URLs most tests hit, reversed once for the class
+        cls.quote_detail_url = reverse('quote_detail', kwargs={'id': cls.quote_mf1_design_c1.id})
+        cls.design_quote_list_url = reverse('design_quote_list_create', kwargs={'design_id': cls.design_c1_analyzed.id})
+
+        # One pre-authenticated client per principal, instead of re-authenticating self.client in every test.
+        cls.client_customer1 = cls._client_for(cls.customer1)
+        cls.client_manufacturer1 = cls._client_for(cls.manufacturer1)
+        cls.client_manufacturer2 = cls._client_for(cls.manufacturer2)
+        cls.client_admin = cls._client_for(cls.admin_user)
+
+    @staticmethod
+    def _client_for(user_obj):
         # APITestCase's force_authenticate is simpler for direct user object login
-        self.client.force_authenticate(user=user_obj)
+        client = APIClient()
+        client.force_authenticate(user=user_obj)
+        return client
 
     # --- Quote Creation Tests (/api/designs/{design_id}/quotes/) ---
     def test_manufacturer_create_quote_success(self):
-        self._login(self.manufacturer2)
-        url = reverse('design_quote_list_create', kwargs={'design_id': self.design_c1_analyzed.id})
+        url = self.design_quote_list_url
         data = {
             "price_usd": "200.00",
             "estimated_lead_time_days": 7,
             "notes": "A good quote from MF2"
         }
-        response = self.client.post(url, data, format='json')
+        response = self.client_manufacturer2.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
         self.assertEqual(Quote.objects.count(), 2)
         new_quote = Quote.objects.get(id=response.data['id'])
@@ -77,6 +104,19 @@ class QuoteAPITests(APITestCase):
         self.assertEqual(new_quote.design, self.design_c1_analyzed)
         self.assertEqual(float(new_quote.price_usd), 200.00)
 
+    def test_manual_quote_replaces_failed_automated_quote(self):
+        Quote.objects.create(
+            design=self.design_c1_analyzed, manufacturer=self.manufacturer2,
+            status=QuoteStatus.PRICING_FAILED, notes="Automated pricing failed: ..."
+        )
+        data = {"price_usd": "200.00", "estimated_lead_time_days": 7}
+        response = self.client_manufacturer2.post(self.design_quote_list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(
+            list(Quote.objects.filter(design=self.design_c1_analyzed, manufacturer=self.manufacturer2).values_list('id', 'status')),
+            [(uuid.UUID(str(response.data['id'])), QuoteStatus.PENDING)]
+        )
+
     def test_manufacturer_cannot_quote_own_design(self):
         # Create a design owned by manufacturer1
         # Ensure manufacturer1 has a Manufacturer profile if your setup relies on it for other things
@@ -89,87 +129,133 @@ class QuoteAPITests(APITestCase):
             s3_file_key="key_mf1_quotes.stl", material="PETG", quantity=1,
             status=DesignModelStatus.ANALYSIS_COMPLETE
         )
-        self._login(self.manufacturer1)
         url = reverse('design_quote_list_create', kwargs={'design_id': design_mf1.id})
         data = {"price_usd": "50.00", "estimated_lead_time_days": 3}
-        response = self.client.post(url, data, format='json')
+        response = self.client_manufacturer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
         self.assertIn("Manufacturers cannot quote their own designs", response.data.get('detail', ''))
 
 
     def test_manufacturer_cannot_quote_design_not_analyzed(self):
-        self._login(self.manufacturer1)
         url = reverse('design_quote_list_create', kwargs={'design_id': self.design_c1_pending.id})
         data = {"price_usd": "100.00", "estimated_lead_time_days": 5}
-        response = self.client.post(url, data, format='json')
+        response = self.client_manufacturer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
         self.assertIn(f"Design must be in '{DesignModelStatus.ANALYSIS_COMPLETE.label}' status", response.data.get('detail', ''))
 
     def test_manufacturer_cannot_quote_same_design_twice(self):
-        self._login(self.manufacturer1)
-        url = reverse('design_quote_list_create', kwargs={'design_id': self.design_c1_analyzed.id})
+        url = self.design_quote_list_url
         data = {"price_usd": "180.00", "estimated_lead_time_days": 8}
-        response = self.client.post(url, data, format='json')
+        response = self.client_manufacturer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
         # The error is raised as ValidationError({"detail": message}) in perform_create
         self.assertEqual(response.data.get('detail'), "You have already submitted a quote for this design.")
 
 
     def test_customer_cannot_create_quote(self):
-        self._login(self.customer1)
-        url = reverse('design_quote_list_create', kwargs={'design_id': self.design_c1_analyzed.id})
+        url = self.design_quote_list_url
         data = {"price_usd": "99.00", "estimated_lead_time_days": 1}
-        response = self.client.post(url, data, format='json')
+        response = self.client_customer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     # --- Quote Listing Tests (/api/designs/{design_id}/quotes/) ---
     def test_design_owner_list_quotes(self):
-        self._login(self.customer1)
-        url = reverse('design_quote_list_create', kwargs={'design_id': self.design_c1_analyzed.id})
-        response = self.client.get(url, format='json')
+        url = self.design_quote_list_url
+        response = self.client_customer1.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(uuid.UUID(response.data[0]['id']), self.quote_mf1_design_c1.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(uuid.UUID(response.data['results'][0]['id']), self.quote_mf1_design_c1.id)
 
     def test_quoting_manufacturer_list_their_quote(self):
-        self._login(self.manufacturer1)
-        url = reverse('design_quote_list_create', kwargs={'design_id': self.design_c1_analyzed.id})
-        response = self.client.get(url, format='json')
+        url = self.design_quote_list_url
+        response = self.client_manufacturer1.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(uuid.UUID(response.data[0]['id']), self.quote_mf1_design_c1.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(uuid.UUID(response.data['results'][0]['id']), self.quote_mf1_design_c1.id)
 
     def test_other_manufacturer_list_empty_for_design(self):
-        self._login(self.manufacturer2)
-        url = reverse('design_quote_list_create', kwargs={'design_id': self.design_c1_analyzed.id})
-        response = self.client.get(url, format='json')
+        url = self.design_quote_list_url
+        response = self.client_manufacturer2.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_list_quotes_query_count_does_not_grow_with_quotes(self):
+        Quote.objects.create(
+            design=self.design_c1_analyzed, manufacturer=self.manufacturer2,
+            price_usd="175.00", estimated_lead_time_days=12, status=QuoteStatus.PENDING
+        )
+        url = self.design_quote_list_url
+        with self.assertNumQueries(2): # design (ownership is checked by customer_id), one joined quote query; no COUNT
+            response = self.client_customer1.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(
+            {item['manufacturer_display_name'] for item in response.data['results']},
+            {"Manuf One Corp", "Manuf Two Ltd"}
+        )
+
+    def test_list_quotes_is_paginated(self):
+        Quote.objects.create(
+            design=self.design_c1_analyzed, manufacturer=self.manufacturer2,
+            price_usd="175.00", estimated_lead_time_days=12, status=QuoteStatus.PENDING
+        )
+        url = self.design_quote_list_url
+        response = self.client_customer1.get(url, {'page_size': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data) # Pages are sized without a COUNT(*)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client_customer1.get(response.data['next'], format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+        response = self.client_customer1.get(url, {'page_size': 1, 'page': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_manufacturer_display_name_follows_company_name(self):
+        self.assertEqual(self.quote_mf1_design_c1.manufacturer_display_name, "Manuf One Corp")
+        self.manufacturer1.company_name = "Manuf One Renamed"
+        self.manufacturer1.save()
+        self.quote_mf1_design_c1.refresh_from_db()
+        self.assertEqual(self.quote_mf1_design_c1.manufacturer_display_name, "Manuf One Renamed")
+
+        self.manufacturer1.company_name = ""
+        self.manufacturer1.save()
+        self.quote_mf1_design_c1.refresh_from_db()
+        self.assertEqual(self.quote_mf1_design_c1.manufacturer_display_name, self.manufacturer1.email)
+
+    def test_retrieve_quote_detail_single_query(self):
+        url = self.quote_detail_url
+        with self.assertNumQueries(1):
+            response = self.client_manufacturer1.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['design_name'], self.design_c1_analyzed.design_name)
+        self.assertEqual(response.data['status_display'], self.quote_mf1_design_c1.get_status_display())
 
     # --- Quote Detail Tests (/api/quotes/{quote_id}/) ---
     def test_design_owner_retrieve_quote_detail(self):
-        self._login(self.customer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
-        response = self.client.get(url, format='json')
+        url = self.quote_detail_url
+        response = self.client_customer1.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(uuid.UUID(response.data['id']), self.quote_mf1_design_c1.id)
 
     def test_quoting_manufacturer_retrieve_quote_detail(self):
-        self._login(self.manufacturer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
-        response = self.client.get(url, format='json')
+        url = self.quote_detail_url
+        response = self.client_manufacturer1.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(uuid.UUID(response.data['id']), self.quote_mf1_design_c1.id)
 
     def test_other_user_cannot_retrieve_quote_detail(self):
-        self._login(self.manufacturer2)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
-        response = self.client.get(url, format='json')
+        url = self.quote_detail_url
+        response = self.client_manufacturer2.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     # --- Quote Update Tests (/api/quotes/{quote_id}/) ---
     def test_customer_accept_quote(self):
-        self._login(self.customer1)
 
         # Ensure the quote to be accepted is initially PENDING
         self.quote_mf1_design_c1.status = QuoteStatus.PENDING
@@ -181,11 +267,14 @@ class QuoteAPITests(APITestCase):
             price_usd="180.00", estimated_lead_time_days=12, status=QuoteStatus.PENDING
         )
 
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
+        url = self.quote_detail_url
         data = {"status": QuoteStatus.ACCEPTED.value}
 
         # Make the API call to accept the quote
-        response = self.client.patch(url, data, format='json')
+        # Load, lock + re-read status, quote UPDATE, order INSERT, design UPDATE, sibling UPDATE,
+        # plus 4 SAVEPOINT/RELEASE statements for the nested atomic blocks.
+        with self.assertNumQueries(10):
+            response = self.client_customer1.patch(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
 
         self.quote_mf1_design_c1.refresh_from_db()
@@ -220,66 +309,409 @@ class QuoteAPITests(APITestCase):
         self.assertEqual(quote_mf2_design_c1.status, QuoteStatus.REJECTED)
 
 
+    def test_accept_query_count_independent_of_sibling_quotes(self):
+        siblings = []
+        for i in range(10):
+            manufacturer = User.objects.create_user(
+                email=f"sibling_mf{i}@example.com", password="Password123!", role=UserRole.MANUFACTURER
+            )
+            siblings.append(Quote.objects.create(
+                design=self.design_c1_analyzed, manufacturer=manufacturer,
+                price_usd="120.00", estimated_lead_time_days=9, status=QuoteStatus.PENDING
+            ))
+        with self.assertNumQueries(10): # Same as with one sibling: they are rejected by a single UPDATE
+            response = self.client_customer1.patch(self.quote_detail_url, {"status": QuoteStatus.ACCEPTED.value}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(
+            Quote.objects.filter(pk__in=[q.pk for q in siblings], status=QuoteStatus.REJECTED).count(), len(siblings)
+        )
+
+    def test_accept_with_existing_order_keeps_single_order(self):
+        from orders.models import Order # Import locally for test
+        Order.objects.create(
+            design=self.design_c1_analyzed, accepted_quote=self.quote_mf1_design_c1,
+            customer=self.customer1, manufacturer=self.manufacturer1, order_total_price_usd="150.00"
+        )
+        url = self.quote_detail_url
+        response = self.client_customer1.patch(url, {"status": QuoteStatus.ACCEPTED.value}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(Order.objects.filter(accepted_quote=self.quote_mf1_design_c1).count(), 1)
+        self.design_c1_analyzed.refresh_from_db()
+        self.assertEqual(self.design_c1_analyzed.status, DesignModelStatus.ANALYSIS_COMPLETE) # Side effects rolled back
+
     def test_customer_reject_quote(self):
-        self._login(self.customer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
+        url = self.quote_detail_url
         data = {"status": QuoteStatus.REJECTED.value}
-        response = self.client.patch(url, data, format='json')
+        response = self.client_customer1.patch(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
         self.quote_mf1_design_c1.refresh_from_db()
         self.assertEqual(self.quote_mf1_design_c1.status, QuoteStatus.REJECTED)
 
     def test_customer_invalid_status_update(self):
-        self._login(self.customer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
+        url = self.quote_detail_url
         data = {"status": QuoteStatus.EXPIRED.value}
-        response = self.client.patch(url, data, format='json')
+        response = self.client_customer1.patch(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     def test_manufacturer_update_pending_quote_details(self):
-        self._login(self.manufacturer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
+        url = self.quote_detail_url
         data = {"price_usd": "160.00", "notes": "Updated notes for pending quote"}
-        response = self.client.patch(url, data, format='json')
+        response = self.client_manufacturer1.patch(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
         self.quote_mf1_design_c1.refresh_from_db()
         self.assertEqual(float(self.quote_mf1_design_c1.price_usd), 160.00)
         self.assertEqual(self.quote_mf1_design_c1.notes, data['notes'])
 
+    def test_manufacturer_update_does_not_load_related_users(self):
+        with self.assertNumQueries(2): # quote joined with its design, then the UPDATE
+            response = self.client_manufacturer1.patch(self.quote_detail_url, {"notes": "Updated notes."}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
     def test_manufacturer_cannot_accept_own_quote(self):
-        self._login(self.manufacturer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
+        url = self.quote_detail_url
         data = {"status": QuoteStatus.ACCEPTED.value}
-        response = self.client.patch(url, data, format='json')
+        response = self.client_manufacturer1.patch(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     # --- Quote Deletion Tests (/api/quotes/{quote_id}/) ---
     def test_manufacturer_delete_pending_quote(self):
-        self._login(self.manufacturer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
-        response = self.client.delete(url, format='json')
+        url = self.quote_detail_url
+        response = self.client_manufacturer1.delete(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Quote.objects.filter(id=self.quote_mf1_design_c1.id).exists())
 
     def test_manufacturer_cannot_delete_accepted_quote(self):
         self.quote_mf1_design_c1.status = QuoteStatus.ACCEPTED
         self.quote_mf1_design_c1.save()
-        self._login(self.manufacturer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
-        response = self.client.delete(url, format='json')
+        url = self.quote_detail_url
+        response = self.client_manufacturer1.delete(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     def test_customer_cannot_delete_quote(self):
-        self._login(self.customer1)
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
-        response = self.client.delete(url, format='json')
+        url = self.quote_detail_url
+        response = self.client_customer1.delete(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     def test_admin_can_delete_any_quote(self):
-        self._login(self.admin_user)
         self.quote_mf1_design_c1.status = QuoteStatus.ACCEPTED
         self.quote_mf1_design_c1.save()
-        url = reverse('quote_detail', kwargs={'id': self.quote_mf1_design_c1.id})
-        response = self.client.delete(url, format='json')
+        url = self.quote_detail_url
+        response = self.client_admin.delete(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Quote.objects.filter(id=self.quote_mf1_design_c1.id).exists())
+
+
+class BulkPricingTests(SimpleTestCase):
+    """The vectorized bulk path must agree with the scalar Decimal path in quotes.pricing."""
+
+    def _manufacturer(self, email, markup, pla_props, machining, lead_days=5):
+        return Manufacturer(
+            user=User(email=email, role=UserRole.MANUFACTURER),
+            markup_factor=Decimal(markup),
+            capabilities={
+                "pricing_factors": {
+                    "material_properties": {"PLA": pla_props} if pla_props else {},
+                    "machining": machining,
+                    "estimated_lead_time_base_days": lead_days,
+                }
+            },
+        )
+
+    def setUp(self):
+        self.design = Design(material="PLA", geometric_data={"volume_cm3": 50.0, "complexity_score": 0.8})
+        self.manufacturers = [
+            self._manufacturer("bulk_mf1@example.com", "1.20", {"density_g_cm3": 1.25, "cost_usd_kg": 20.0},
+                               {"base_time_cost_unit": "10.0", "time_multiplier_complexity_cost_unit": "50.0"}),
+            self._manufacturer("bulk_mf2@example.com", "1.35", {"density_g_cm3": 1.24, "cost_usd_kg": 18.5},
+                               {"base_time_cost_unit": 12, "time_multiplier_complexity_cost_unit": 55}, lead_days=9),
+            # No PLA pricing data -> cannot be priced
+            self._manufacturer("bulk_mf3@example.com", "1.10", None,
+                               {"base_time_cost_unit": 8, "time_multiplier_complexity_cost_unit": 40}),
+            # Negative material cost -> fails validation
+            self._manufacturer("bulk_mf4@example.com", "1.10", {"density_g_cm3": 1.25, "cost_usd_kg": -1},
+                               {"base_time_cost_unit": 8, "time_multiplier_complexity_cost_unit": 40}),
+        ]
+
+    def test_bulk_prices_match_scalar_path(self):
+        tables = build_factor_tables(self.manufacturers)
+        results = price_design_bulk(self.design, tables)
+
+        self.assertEqual(len(results), len(self.manufacturers))
+        for manufacturer, price_usd, lead_time_days in results:
+            scalar = calculate_quote_price(self.design, manufacturer)
+            self.assertEqual(price_usd, scalar.price_usd, manufacturer.user.email)
+            self.assertEqual(lead_time_days, scalar.estimated_lead_time_days, manufacturer.user.email)
+
+        self.assertEqual(results[0][1], Decimal("61.50"))
+        self.assertIsNone(results[2][1])
+        self.assertIsNone(results[3][1])
+
+        # Half-cent totals sit just below .5 as binary floats; both paths must still round them up.
+        design = Design(material="PLA", geometric_data={"volume_cm3": 1, "complexity_score": 0})
+        half_cent = [
+            self._manufacturer("bulk_half@example.com", "1", {"density_g_cm3": 1, "cost_usd_kg": 0},
+                               {"base_time_cost_unit": base_time, "time_multiplier_complexity_cost_unit": 0})
+            for base_time in (1.005, 2.675, "0.125", 1.015)
+        ]
+        for manufacturer, price_usd, _ in price_design_bulk(design, build_factor_tables(half_cent)):
+            self.assertEqual(price_usd, calculate_quote_price(design, manufacturer).price_usd)
+        self.assertEqual([price for _, price, _ in price_design_bulk(design, build_factor_tables(half_cent))],
+                         [Decimal("1.01"), Decimal("2.68"), Decimal("0.13"), Decimal("1.02")])
+
+    def test_unknown_material_prices_to_none(self):
+        self.design.material = "Titanium"
+        results = price_design_bulk(self.design, build_factor_tables(self.manufacturers))
+        self.assertTrue(all(price_usd is None for _, price_usd, _ in results))
+
+    def test_scalar_errors_keep_reporting_order(self):
+        self.design.geometric_data = {"volume_cm3": 0, "complexity_score": 0.8}
+        self.design.material = "Titanium"
+        manufacturer = self._manufacturer("bulk_mf5@example.com", "0", None,
+                                          {"base_time_cost_unit": -1, "time_multiplier_complexity_cost_unit": 40})
+        result = calculate_quote_price(self.design, manufacturer)
+        self.assertIsNone(result.price_usd)
+        self.assertEqual(result.errors, [
+            "Design volume must be a positive value.",
+            "Manufacturer does not have pricing information for material: Titanium",
+            "Base time cost unit cannot be negative.",
+            "Manufacturer markup factor must be positive.",
+        ])
+
+    def test_pricing_table_is_parsed_once_per_instance(self):
+        manufacturer = self.manufacturers[0]
+        table = manufacturer.pricing_table
+        self.assertIs(manufacturer.pricing_table, table)
+        self.assertEqual(_to_decimal(table.materials["PLA"].density_g_cm3), Decimal("1.25"))
+        self.assertEqual(_to_decimal(table.materials["PLA"].cost_usd_kg), Decimal("20"))
+        self.assertEqual(_to_decimal(table.base_time), Decimal("10")) # parsed from the "10.0" string
+        self.assertEqual(_to_decimal(table.markup), Decimal("1.2"))
+
+    def test_string_factors_parse_exactly(self):
+        manufacturer = self._manufacturer("bulk_mf6@example.com", "1.15", {"density_g_cm3": "1.2345675", "cost_usd_kg": "19.99"},
+                                          {"base_time_cost_unit": "7.5", "time_multiplier_complexity_cost_unit": 0})
+        table = manufacturer.pricing_table
+        self.assertEqual(_to_decimal(table.materials["PLA"].density_g_cm3), Decimal("1.2345675")) # no rounding at any digit
+        self.assertEqual(_to_decimal(table.materials["PLA"].cost_usd_kg), Decimal("19.99"))
+        self.assertEqual(_to_decimal(table.base_time), Decimal("7.5"))
+        self.assertEqual(_to_decimal(table.markup), Decimal("1.15"))
+
+    def test_price_rounds_half_up_to_cents(self):
+        self.design.geometric_data = {"volume_cm3": 1, "complexity_score": 0}
+        for base_time, expected in (("0.125", "0.13"), ("0.1249", "0.12"), ("1", "1.00")):
+            manufacturer = self._manufacturer("bulk_mf7@example.com", "1", {"density_g_cm3": 1, "cost_usd_kg": 0},
+                                              {"base_time_cost_unit": base_time, "time_multiplier_complexity_cost_unit": 0})
+            self.assertEqual(str(calculate_quote_price(self.design, manufacturer).price_usd), expected, base_time)
+
+
+    def test_prices_match_decimal_reference(self):
+        # The original Decimal formula, rounded only once at the end.
+        def reference(volume, complexity, density, cost_kg, base_time, time_mult, markup):
+            d = lambda value: Decimal(str(value))
+            material_cost = d(volume) * d(density) * (d(cost_kg) / Decimal("1000.0"))
+            total = (material_cost + d(base_time) + d(complexity) * d(time_mult)) * d(markup)
+            return total.quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+        # Exact total is 52.4350004; truncating each step in micro-units used to give 52.43.
+        cases = [(219.532, 0.063, 5.557, 22.6, 10.09, 11.957, "1.365")]
+        rng = random.Random(1234)
+        cases += [
+            (round(rng.uniform(0.1, 500), 3), round(rng.uniform(0, 5), 3), round(rng.uniform(0.5, 9), 3),
+             round(rng.uniform(0, 80), 2), round(rng.uniform(0, 40), 2), round(rng.uniform(0, 60), 3),
+             str(round(rng.uniform(1, 2), 3)))
+            for _ in range(200)
+        ]
+        for volume, complexity, density, cost_kg, base_time, time_mult, markup in cases:
+            design = Design(material="PLA", geometric_data={"volume_cm3": volume, "complexity_score": complexity})
+            manufacturer = self._manufacturer("bulk_mf8@example.com", markup, {"density_g_cm3": density, "cost_usd_kg": cost_kg},
+                                              {"base_time_cost_unit": base_time, "time_multiplier_complexity_cost_unit": time_mult})
+            expected = reference(volume, complexity, density, cost_kg, base_time, time_mult, markup)
+            self.assertEqual(calculate_quote_price(design, manufacturer).price_usd, expected, (volume, complexity, density, cost_kg))
+
+        design = Design(material="PLA", geometric_data={"volume_cm3": 219.532, "complexity_score": 0.063})
+        manufacturer = self._manufacturer("bulk_mf8@example.com", "1.365", {"density_g_cm3": 5.557, "cost_usd_kg": 22.6},
+                                          {"base_time_cost_unit": 10.09, "time_multiplier_complexity_cost_unit": 11.957})
+        details = calculate_quote_price(design, manufacturer, verbose=True)
+        self.assertEqual(details.price_usd, Decimal("52.44"))
+        self.assertEqual(details.calculation_details["final_total_price_usd"], 52.44)
+        self.assertEqual(price_design_bulk(design, build_factor_tables([manufacturer]))[0][1], Decimal("52.44"))
+
+class PricingTableCacheTests(TestCase):
+    """Parsed pricing factors are shared between instances until the profile is saved again."""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            email="cache_mf@example.com", password="Password123!",
+            company_name="Cache Manuf", role=UserRole.MANUFACTURER
+        )
+        self.profile = Manufacturer.objects.create(
+            user=user, markup_factor=Decimal("1.20"),
+            capabilities={"pricing_factors": {"material_properties": {"PLA": {"density_g_cm3": 1.25, "cost_usd_kg": 20}}}}
+        )
+
+    def test_pricing_table_shared_until_profile_saved(self):
+        first = Manufacturer.objects.get(pk=self.profile.pk).pricing_table
+        self.assertIs(Manufacturer.objects.get(pk=self.profile.pk).pricing_table, first)
+
+        self.profile.markup_factor = Decimal("1.50")
+        self.profile.save()
+        refreshed = Manufacturer.objects.get(pk=self.profile.pk).pricing_table
+        self.assertIsNot(refreshed, first)
+        self.assertEqual(_to_decimal(refreshed.markup), Decimal("1.5"))
+
+    def test_cache_does_not_keep_profiles_alive(self):
+        manufacturer = Manufacturer.objects.get(pk=self.profile.pk)
+        manufacturer.pricing_table
+        ref = weakref.ref(manufacturer)
+        del manufacturer
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_queryset_update_refreshes_only_with_updated_at(self):
+        first = Manufacturer.objects.get(pk=self.profile.pk).pricing_table
+        Manufacturer.objects.filter(pk=self.profile.pk).update(markup_factor=Decimal("1.50"))
+        self.assertIs(Manufacturer.objects.get(pk=self.profile.pk).pricing_table, first) # documented caveat
+
+        Manufacturer.objects.filter(pk=self.profile.pk).update(markup_factor=Decimal("1.50"), updated_at=timezone.now())
+        self.assertEqual(_to_decimal(Manufacturer.objects.get(pk=self.profile.pk).pricing_table.markup), Decimal("1.5"))
+
+
+class QuotePriceCacheTests(TestCase):
+    """calculate_quote_price reuses results until the design or the profile is saved again."""
+
+    def setUp(self):
+        cache.clear()
+        customer = User.objects.create_user(
+            email="price_cache_cust@example.com", password="Password123!", role=UserRole.CUSTOMER
+        )
+        user = User.objects.create_user(
+            email="price_cache_mf@example.com", password="Password123!",
+            company_name="Price Cache Manuf", role=UserRole.MANUFACTURER
+        )
+        self.profile = Manufacturer.objects.create(
+            user=user, markup_factor=Decimal("1.20"),
+            capabilities={"pricing_factors": {"material_properties": {"PLA": {"density_g_cm3": 1.25, "cost_usd_kg": 20}}}}
+        )
+        self.design = Design.objects.create(
+            customer=customer, design_name="Cache Design", s3_file_key="cache.stl",
+            material="PLA", quantity=1, status=DesignModelStatus.ANALYSIS_COMPLETE,
+            geometric_data={"volume_cm3": 50.0, "complexity_score": 0.8}
+        )
+
+    def test_cached_until_design_saved(self):
+        first = calculate_quote_price(self.design, self.profile)
+        self.assertEqual(first.price_usd, Decimal("1.50"))
+        with patch("quotes.pricing._compute") as compute:
+            self.assertEqual(calculate_quote_price(self.design, self.profile), first)
+            compute.assert_not_called()
+
+        self.design.geometric_data = {"volume_cm3": 100.0, "complexity_score": 0.8}
+        self.design.save()
+        self.assertEqual(calculate_quote_price(self.design, self.profile).price_usd, Decimal("3.00"))
+
+    def test_pricing_qs_loads_every_column_pricing_reads(self):
+        design = Design.pricing_qs().get(pk=self.design.pk)
+        profile = Manufacturer.objects.get(pk=self.profile.pk)
+        with self.assertNumQueries(0): # No deferred field, nor profile.user for logging, is fetched
+            self.assertEqual(calculate_quote_price(design, profile).price_usd, Decimal("1.50"))
+
+    def test_breakdown_only_when_verbose(self):
+        self.assertEqual(calculate_quote_price(self.design, self.profile).calculation_details, {})
+        details = calculate_quote_price(self.design, self.profile, verbose=True).calculation_details
+        self.assertEqual(details["final_total_price_usd"], 1.5)
+        self.assertEqual(details["estimated_lead_time_days"], 7)
+
+    def test_pricing_errors_are_cached_too(self):
+        self.design.material = "ABS"
+        self.design.save()
+        first = calculate_quote_price(self.design, self.profile)
+        self.assertTrue(first.errors)
+        with patch("quotes.pricing._validate") as validate:
+            self.assertEqual(calculate_quote_price(self.design, self.profile), first)
+            validate.assert_not_called()
+
+
+class ComputeQuotePriceTaskTests(TestCase):
+    """compute_quote_price turns CALCULATING placeholders into priced PENDING quotes."""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            email="task_cust@example.com", password="Password123!", role=UserRole.CUSTOMER
+        )
+        self.manufacturer = User.objects.create_user(
+            email="task_mf@example.com", password="Password123!",
+            company_name="Task Manuf", role=UserRole.MANUFACTURER
+        )
+        self.profile = Manufacturer.objects.create(
+            user=self.manufacturer, markup_factor=Decimal("1.20"),
+            capabilities={"pricing_factors": {
+                "material_properties": {"PLA": {"density_g_cm3": 1.25, "cost_usd_kg": 20.0}},
+                "machining": {"base_time_cost_unit": "10.0", "time_multiplier_complexity_cost_unit": "50.0"},
+                "estimated_lead_time_base_days": 5,
+            }}
+        )
+        self.design = Design.objects.create(
+            customer=self.customer, design_name="Task Design", s3_file_key="task.stl",
+            material="PLA", quantity=1, status=DesignModelStatus.ANALYSIS_COMPLETE,
+            geometric_data={"volume_cm3": 50.0, "complexity_score": 0.8}
+        )
+        self.quote = Quote.objects.create(
+            design=self.design, manufacturer=self.manufacturer, status=QuoteStatus.CALCULATING
+        )
+
+    def test_prices_placeholder_and_marks_design_quoted(self):
+        compute_quote_price(self.quote.id)
+        self.quote.refresh_from_db()
+        self.assertEqual(self.quote.status, QuoteStatus.PENDING)
+        self.assertEqual(self.quote.price_usd, Decimal("61.50"))
+        self.assertEqual(self.quote.estimated_lead_time_days, 5)
+        self.design.refresh_from_db()
+        self.assertEqual(self.design.status, DesignModelStatus.QUOTED)
+
+    def test_unpriceable_placeholder_is_marked_failed(self):
+        self.design.material = "Titanium"
+        self.design.save()
+        compute_quote_price(self.quote.id)
+        self.quote.refresh_from_db()
+        self.assertEqual(self.quote.status, QuoteStatus.PRICING_FAILED)
+        self.assertIsNone(self.quote.price_usd)
+        self.assertEqual(self.quote.notes, "Automated pricing failed: Manufacturer does not have pricing information for material: Titanium")
+        self.design.refresh_from_db()
+        self.assertEqual(self.design.status, DesignModelStatus.ANALYSIS_COMPLETE)
+
+    def test_non_calculating_quote_is_left_alone(self):
+        Quote.objects.filter(pk=self.quote.pk).update(
+            status=QuoteStatus.PENDING, price_usd="99.00", estimated_lead_time_days=3
+        )
+        compute_quote_price(self.quote.id)
+        self.quote.refresh_from_db()
+        self.assertEqual(self.quote.price_usd, Decimal("99.00"))
+
+
+class QuoteStatusTransitionTests(SimpleTestCase):
+    """QuoteSerializer only accepts the transitions listed in its transition table."""
+
+    def setUp(self):
+        self.customer = User(email="transition_cust@example.com", role=UserRole.CUSTOMER)
+        self.manufacturer = User(email="transition_mf@example.com", role=UserRole.MANUFACTURER)
+        self.other = User(email="transition_other@example.com", role=UserRole.CUSTOMER)
+        design = Design(customer=self.customer, design_name="Transition Design")
+        self.quote = Quote(design=design, manufacturer=self.manufacturer, status=QuoteStatus.PENDING)
+
+    def _is_valid(self, user, new_status):
+        request = APIRequestFactory().patch('/')
+        request.user = user
+        serializer = QuoteSerializer(self.quote, data={"status": new_status}, partial=True, context={"request": request})
+        return serializer.is_valid()
+
+    def test_allowed_transitions(self):
+        self.assertTrue(self._is_valid(self.customer, QuoteStatus.ACCEPTED))
+        self.assertTrue(self._is_valid(self.customer, QuoteStatus.REJECTED))
+        self.assertTrue(self._is_valid(self.manufacturer, QuoteStatus.EXPIRED))
+        self.assertTrue(self._is_valid(self.manufacturer, QuoteStatus.PENDING)) # Not a transition
+
+    def test_rejected_transitions(self):
+        self.assertFalse(self._is_valid(self.customer, QuoteStatus.EXPIRED))
+        self.assertFalse(self._is_valid(self.manufacturer, QuoteStatus.ACCEPTED))
+        self.assertFalse(self._is_valid(self.other, QuoteStatus.ACCEPTED))
+        self.quote.status = QuoteStatus.REJECTED
+        self.assertFalse(self._is_valid(self.customer, QuoteStatus.ACCEPTED))
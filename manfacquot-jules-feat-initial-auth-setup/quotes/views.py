@@ -1,11 +1,23 @@
+import logging
+
 from rest_framework import generics, permissions, status, serializers, exceptions
 from rest_framework.response import Response
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
 from .models import Quote, QuoteStatus
+from .pagination import QuotePagination
 from .serializers import QuoteSerializer
 from designs.models import Design, DesignStatus as DesignModelStatus
 from accounts.models import UserRole
+from orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+# Statuses a customer may move a PENDING quote to, as raw strings for O(1) lookups
+# (request.data['status'] is a plain str, not a QuoteStatus).
+_CUSTOMER_TERMINAL = frozenset({QuoteStatus.ACCEPTED.value, QuoteStatus.REJECTED.value})
 
 # --- Custom Permissions for Quotes ---
 
@@ -19,7 +31,8 @@ class IsQuoteOwnerOrDesignOwnerOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj): # obj is a Quote instance
         if request.user.is_staff:
             return True
-        return obj.manufacturer == request.user or obj.design.customer == request.user
+        # FK id comparisons, so neither the manufacturer nor the design's customer has to be loaded.
+        return obj.manufacturer_id == request.user.id or obj.design.customer_id == request.user.id
 
 class CanCreateQuoteForDesign(permissions.BasePermission):
     """
@@ -46,7 +59,7 @@ class CanCreateQuoteForDesign(permissions.BasePermission):
             self.message = "Design not found." # get_object_or_404 will handle this in view if preferred
             return False
 
-        if design.customer == request.user:
+        if design.customer_id == request.user.id: # FK id comparison; the customer row is never loaded
             self.message = "Manufacturers cannot quote their own designs."
             return False
 
@@ -58,6 +71,7 @@ class CanCreateQuoteForDesign(permissions.BasePermission):
             )
             return False
 
+        view.design = design # Reused by QuoteListCreateView.perform_create instead of fetching it again
         return True
 
 class CanUpdateQuote(permissions.BasePermission):
@@ -75,8 +89,8 @@ class CanUpdateQuote(permissions.BasePermission):
             return True
 
         # Who is making the request?
-        is_design_owner = (obj.design.customer == request.user)
-        is_quote_creator = (obj.manufacturer == request.user)
+        is_design_owner = (obj.design.customer_id == request.user.id)
+        is_quote_creator = (obj.manufacturer_id == request.user.id)
 
         if not (is_design_owner or is_quote_creator):
             return False # Not involved at all
@@ -85,7 +99,7 @@ class CanUpdateQuote(permissions.BasePermission):
         if 'status' in request.data and len(request.data) == 1:
             new_status = request.data.get('status')
             if is_design_owner:
-                if obj.status == QuoteStatus.PENDING and new_status in [QuoteStatus.ACCEPTED, QuoteStatus.REJECTED]:
+                if obj.status == QuoteStatus.PENDING and str(new_status) in _CUSTOMER_TERMINAL:
                     return True
                 self.message = f"Customer can only change status from Pending to Accepted/Rejected. Invalid transition from '{obj.status}' to '{new_status}'."
                 return False
@@ -110,12 +124,21 @@ class CanUpdateQuote(permissions.BasePermission):
 
 # --- API Views for Quotes ---
 
+# Columns needed to serialize a quote in list responses (QuoteSerializer.Meta.fields);
+# everything else on the joined design row is left out.
+QUOTE_LIST_FIELDS = (
+    'id', 'design', 'manufacturer', 'manufacturer_display_name', 'price_usd',
+    'estimated_lead_time_days', 'status', 'notes', 'created_at', 'updated_at',
+    'design__design_name',
+)
+
 class QuoteListCreateView(generics.ListCreateAPIView):
     """
-    GET /api/designs/{design_id}/quotes/ - List quotes for a specific design.
+    GET /api/designs/{design_id}/quotes/ - List quotes for a specific design (paginated).
     POST /api/designs/{design_id}/quotes/ - Create a quote for a specific design.
     """
     serializer_class = QuoteSerializer
+    pagination_class = QuotePagination
     # permission_classes = [permissions.IsAuthenticated] # Base permission
 
     def get_permissions(self):
@@ -129,25 +152,30 @@ class QuoteListCreateView(generics.ListCreateAPIView):
         design = get_object_or_404(Design, pk=design_id)
         user = self.request.user
 
-        if user.is_staff: # Admin sees all quotes for the design
-            return Quote.objects.filter(design=design).select_related('manufacturer', 'design')
-        if design.customer == user: # Design owner sees all quotes for their design
-            return Quote.objects.filter(design=design).select_related('manufacturer', 'design')
+        # Single base queryset for every branch; joins come from QuoteSerializer.setup_eager_loading.
+        quotes = QuoteSerializer.setup_eager_loading(Quote.objects.all()).only(*QUOTE_LIST_FIELDS).filter(design=design)
+        if user.is_staff or design.customer_id == user.id: # Admin or design owner sees all quotes for the design
+            return quotes
         if user.role == UserRole.MANUFACTURER: # Manufacturer sees only their quotes for this design
-            return Quote.objects.filter(design=design, manufacturer=user).select_related('manufacturer', 'design')
+            return quotes.filter(manufacturer_id=user.id)
 
-        return Quote.objects.none() # Other users see none
+        return quotes.none() # Other users see none
 
     def perform_create(self, serializer):
-        design_id = self.kwargs.get('design_id')
-        design = get_object_or_404(Design, pk=design_id) # Already validated by CanCreateQuoteForDesign
+        # CanCreateQuoteForDesign has already loaded (and validated) the design.
+        design = getattr(self, 'design', None) or get_object_or_404(Design, pk=self.kwargs.get('design_id'))
 
-        # Prevent duplicate quotes by the same manufacturer for the same design
-        if Quote.objects.filter(design=design, manufacturer=self.request.user).exists():
+        # Duplicate quotes by the same manufacturer for the same design are rejected by the
+        # uniq_quote_per_mf_per_design constraint; the savepoint keeps the outer transaction usable.
+        try:
+            with transaction.atomic():
+                # A manual quote replaces this manufacturer's failed automated one, if any.
+                Quote.objects.filter(design=design, manufacturer=self.request.user, status=QuoteStatus.PRICING_FAILED).delete()
+                serializer.save(design=design, manufacturer=self.request.user)
+        except IntegrityError:
             raise serializers.ValidationError( # DRF validation error for 400 response
                 {"detail": "You have already submitted a quote for this design."}
             )
-        serializer.save(design=design, manufacturer=self.request.user)
 
 
 class QuoteDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -156,7 +184,7 @@ class QuoteDetailView(generics.RetrieveUpdateDestroyAPIView):
     PUT/PATCH /api/quotes/{quote_id}/ - Update a quote.
     DELETE /api/quotes/{quote_id}/ - Delete a quote.
     """
-    queryset = Quote.objects.select_related('design', 'manufacturer', 'design__customer').all()
+    queryset = QuoteSerializer.setup_eager_loading(Quote.objects.all())
     serializer_class = QuoteSerializer
     lookup_field = 'id'
 
@@ -169,80 +197,85 @@ class QuoteDetailView(generics.RetrieveUpdateDestroyAPIView):
     def perform_destroy(self, instance):
         # Only manufacturer can delete their PENDING quotes (or admin)
         if not (self.request.user.is_staff or
-                (instance.manufacturer == self.request.user and instance.status == QuoteStatus.PENDING)):
+                (instance.manufacturer_id == self.request.user.id and instance.status == QuoteStatus.PENDING)):
             raise exceptions.PermissionDenied( # Corrected here
                 "You can only delete PENDING quotes that you created."
             )
         super().perform_destroy(instance)
 
     def perform_update(self, serializer):
-        logger = __import__('logging').getLogger(__name__) # Define logger at the start of the method
         quote_instance = serializer.instance
         original_status = quote_instance.status
         new_status = serializer.validated_data.get('status', original_status)
+        is_accepting = original_status != QuoteStatus.ACCEPTED and new_status == QuoteStatus.ACCEPTED
+
+        # Most updates (price/notes edits, rejections) are a plain save; only acceptance has side effects.
+        if not is_accepting:
+            serializer.save()
+            return
+
+        # If status changed to ACCEPTED, create an Order.
+        # The quote row stays locked until the order exists, so two concurrent accepts
+        # (or an accept racing a reject) can't both go through.
+        with transaction.atomic():
+            locked_status = (
+                Quote.objects.select_for_update().filter(pk=quote_instance.pk)
+                .values_list('status', flat=True).first()
+            )
+            if locked_status != original_status:
+                raise serializers.ValidationError(
+                    {"detail": f"Quote status changed to '{locked_status}' while this request was being processed."}
+                )
 
-        # Save the quote update
-        updated_quote = serializer.save()
-
-        # If status changed to ACCEPTED, create an Order
-        if original_status != QuoteStatus.ACCEPTED and new_status == QuoteStatus.ACCEPTED:
-            from orders.models import Order # Avoid circular import at top level
-            from django.db import transaction
+            # Save the quote update
+            updated_quote = serializer.save()
 
             try:
-                with transaction.atomic():
-                    # Ensure no duplicate order for this quote
-                    if hasattr(updated_quote, 'order_created_from'):
-                        # This means an order already exists, which ideally shouldn't happen if status transitions are correct
-                        # Or if this endpoint can be called multiple times to "re-accept".
-                        # For now, assume we just log and don't create a new one.
-                        # If re-accepting should update the order, that's different logic.
-                        logger = __import__('logging').getLogger(__name__)
-                        logger.warning(f"Quote {updated_quote.id} re-accepted, but order already exists: {updated_quote.order_created_from.id}")
-                        return
-
-                    # Create the order
-                    order = Order.objects.create(
+                with transaction.atomic(): # Savepoint: a failed order leaves the quote accepted
+                    # Create the order with its estimated delivery date in a single INSERT
+                    order = Order(
                         design=updated_quote.design,
                         accepted_quote=updated_quote,
-                        customer=updated_quote.design.customer,
-                        manufacturer=updated_quote.manufacturer,
+                        customer_id=updated_quote.design.customer_id,
+                        manufacturer_id=updated_quote.manufacturer_id,
                         order_total_price_usd=updated_quote.price_usd,
                         # Initial status for order, e.g., PENDING_PAYMENT
                         # from orders.models import OrderStatus as OS
                         # status=OS.PENDING_PAYMENT
                         # (OrderStatus will be imported in orders.models, direct import here for clarity)
                     )
-                    # Calculate and set estimated delivery date
+                    # Not saved yet, so the date is counted from today
                     order.calculate_and_set_estimated_delivery(
                         quote_lead_time_days=updated_quote.estimated_lead_time_days
                     )
-                    order.save() # Save again if calculate_and_set_estimated_delivery doesn't save
+                    order.save()
 
                     # Optionally, update related design status if applicable
-                    # For example, if the design should now be considered 'Ordered'
-                    if updated_quote.design.status != DesignModelStatus.ORDERED:
-                         updated_quote.design.status = DesignModelStatus.ORDERED
-                         updated_quote.design.save(update_fields=['status', 'updated_at'])
-
-                    # Reject other pending quotes for the same design
-                    design_pk = updated_quote.design.pk
-                    other_pending_quotes = Quote.objects.filter(
+                    # For example, if the design should now be considered 'Ordered'.
+                    # A single conditional UPDATE; the exclude() keeps it idempotent.
+                    Design.objects.filter(pk=updated_quote.design_id).exclude(
+                        status=DesignModelStatus.ORDERED
+                    ).update(status=DesignModelStatus.ORDERED, updated_at=timezone.now())
+
+                    # Reject other pending quotes for the same design, in a single UPDATE.
+                    # The siblings are never loaded, so QuoteDetailView.queryset doesn't prefetch them.
+                    design_pk = updated_quote.design_id
+                    rejected_count = Quote.objects.filter(
                         design_id=design_pk, # Explicitly use design_id
                         status=QuoteStatus.PENDING
-                    ).exclude(id=updated_quote.id)
-
-                    logger.debug(f"Found {other_pending_quotes.count()} other pending quotes to reject for design {design_pk}.")
-                    for q in other_pending_quotes:
-                        logger.debug(f"Rejecting quote {q.id}")
-                        q.status = QuoteStatus.REJECTED
-                        q.save(update_fields=['status', 'updated_at'])
-
+                    ).exclude(id=updated_quote.id).update(status=QuoteStatus.REJECTED, updated_at=timezone.now())
+                    logger.debug(f"Rejected {rejected_count} other pending quotes for design {design_pk}.")
+
+            except IntegrityError:
+                # Order.accepted_quote is a OneToOneField (unique), so a second order for this quote
+                # is rejected by the database instead of being looked up before every accept.
+                # Ideally unreachable given the status transitions and the row lock above.
+                # If re-accepting should update the order, that's different logic.
+                logger.warning(f"Quote {updated_quote.id} re-accepted, but an order already exists for it.")
             except Exception as e:
                 # Log the error, and potentially revert quote status if order creation is critical
                 # For now, the quote status is already saved as ACCEPTED.
                 # A more robust solution might use a post_save signal on Quote for order creation.
-                logger = __import__('logging').getLogger(__name__)
                 logger.error(f"Error creating order for accepted quote {updated_quote.id}: {e}")
                 # serializer.instance.status = original_status # Revert status? Complex interaction.
                 # serializer.instance.save()
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-14 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('customer', 'manufacturer', 'order_id'), name='uniq_review_per_order'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(condition=models.Q(('order_id__isnull', True)), fields=('customer', 'manufacturer'), name='uniq_general_review'),
+        ),
+    ]
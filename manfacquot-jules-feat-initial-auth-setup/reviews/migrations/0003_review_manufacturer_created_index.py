@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-14 14:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_review_unique_per_customer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['manufacturer', '-created_at'], name='rev_mf_created_desc_idx'),
+        ),
+    ]
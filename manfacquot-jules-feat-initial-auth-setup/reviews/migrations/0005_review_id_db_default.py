@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-14 14:40
+
+from django.db import migrations
+
+
+def set_id_db_default(apps, schema_editor):
+    # gen_random_uuid() is built in from PostgreSQL 13 (pgcrypto before that); other backends
+    # keep relying on the model's uuid.uuid4 default.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE "Reviews" ALTER COLUMN "id" SET DEFAULT gen_random_uuid()')
+
+
+def drop_id_db_default(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE "Reviews" ALTER COLUMN "id" DROP DEFAULT')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_review_rating_check'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_id_db_default, drop_id_db_default),
+    ]
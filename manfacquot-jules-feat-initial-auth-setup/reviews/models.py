@@ -6,6 +6,8 @@ from django.utils.translation import gettext_lazy as _
 from accounts.models import UserRole # Assuming this is the correct path
 
 class Review(models.Model):
+    # On PostgreSQL the column also defaults to gen_random_uuid() (migration 0005), for rows
+    # inserted outside the ORM; the ORM always sends the uuid4 generated here.
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     customer = models.ForeignKey(
@@ -26,7 +28,8 @@ class Review(models.Model):
     # ensure on_delete behavior is defined (e.g., models.SET_NULL if review should persist).
     order_id = models.UUIDField(blank=True, null=True)
 
-    rating = models.IntegerField(
+    # Range enforced by the validators for API input and by the rating_1_5 CHECK in the database.
+    rating = models.PositiveSmallIntegerField(
         validators=[
             MinValueValidator(1, message=_("Rating must be at least 1.")),
             MaxValueValidator(5, message=_("Rating must be at most 5."))
@@ -47,14 +50,18 @@ class Review(models.Model):
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
         ordering = ['-created_at']
-        # Consider unique constraints based on business rules, e.g.,
-        # unique_together = [['customer', 'manufacturer', 'order_id']]
-        # This would require order_id to be non-null for the constraint to be most effective,
-        # or handle nulls specifically if your DB supports it (e.g. PostgreSQL's unique nulls).
-        # For now, allowing multiple reviews from same customer to same manufacturer if order_id differs or is null.
-        # If order_id is always null initially, a customer could review a manufacturer multiple times.
-        # This might be desired or not. If not, unique_together = [['customer', 'manufacturer']]
-        # could be used if reviews are not tied to orders.
-        # For now, no unique_together constraint is set, allowing flexibility.
-        # Business logic for preventing duplicate reviews can be handled in serializers/views if needed.
-        pass
+        indexes = [
+            # "Reviews for this manufacturer, newest first" (ReviewListCreateView), read in index order without a sort
+            models.Index(fields=['manufacturer', '-created_at'], name='rev_mf_created_desc_idx'),
+        ]
+        # Duplicate reviews are rejected by the database (see ReviewSerializer.create):
+        # one review per customer per manufacturer per order, and, since NULLs never collide in a
+        # unique index, a separate partial constraint for the single general (order-less) review.
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'manufacturer', 'order_id'], name='uniq_review_per_order'),
+            models.UniqueConstraint(
+                fields=['customer', 'manufacturer'], condition=models.Q(order_id__isnull=True),
+                name='uniq_general_review'
+            ),
+            models.CheckConstraint(condition=models.Q(rating__gte=1) & models.Q(rating__lte=5), name='rating_1_5'),
+        ]
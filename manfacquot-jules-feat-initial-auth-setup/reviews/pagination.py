@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ReviewPagination(CursorPagination):
+    """
+    Bounded, newest-first pages of a manufacturer's reviews.
+
+    Cursor pagination seeks from the last row seen instead of skipping an OFFSET, so with the
+    (manufacturer, -created_at) index every page costs the same however deep the history is.
+    Responses carry next/previous cursor links but no total count.
+    """
+    page_size = 25
+    ordering = '-created_at'
@@ -1,12 +1,32 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from .models import Review
 from accounts.models import User, UserRole # For validation and representation
 
+class UserDisplayNameField(serializers.CharField):
+    """
+    Read-only display name (company_name, or email if blank) for a related user.
+    List/detail views annotate it in SQL (see reviews.views.with_display_names); instances that
+    weren't annotated, e.g. one just created, fall back to reading the related user.
+    """
+    def __init__(self, user_field, **kwargs):
+        self.user_field = user_field
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        value = getattr(instance, self.source, None)
+        if value is None:
+            user = getattr(instance, self.user_field)
+            value = user.company_name or user.email
+        return value
+
+
 class ReviewSerializer(serializers.ModelSerializer):
-    customer_display_name = serializers.SerializerMethodField(read_only=True)
+    customer_display_name = UserDisplayNameField('customer')
     # manufacturer_company_name = serializers.CharField(source='manufacturer.company_name', read_only=True)
     # To handle potential blank company_name for manufacturer:
-    manufacturer_display_name = serializers.SerializerMethodField(read_only=True)
+    manufacturer_display_name = UserDisplayNameField('manufacturer')
 
     class Meta:
         model = Review
@@ -22,15 +42,10 @@ class ReviewSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'customer_display_name', 'manufacturer_display_name', 'created_at', 'updated_at']
-        # 'customer' is often set implicitly from request.user.
-        # 'manufacturer' is typically part of the URL or payload for creation.
-
-    def get_customer_display_name(self, obj):
-        return obj.customer.company_name or obj.customer.email
-
-    def get_manufacturer_display_name(self, obj):
-        return obj.manufacturer.company_name or obj.manufacturer.email
+        read_only_fields = [
+            'id', 'customer_display_name', 'manufacturer_display_name', 'created_at', 'updated_at',
+            'customer', 'manufacturer' # Set by the view from request.user and the URL
+        ]
 
     def validate_customer(self, value):
         """Ensure the customer user has the 'customer' role."""
@@ -44,17 +59,11 @@ class ReviewSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Reviews can only be for Manufacturer users.")
         return value
 
-    def validate_rating(self, value):
-        """Additional check though model validator also exists."""
-        if not (1 <= value <= 5):
-            raise serializers.ValidationError("Rating must be between 1 and 5.")
-        return value
-
     def validate(self, data):
         """
         Object-level validation.
         - Ensure the customer creating the review is the logged-in user.
-        - Prevent duplicate reviews (e.g., one review per customer per manufacturer/order).
+        Duplicate reviews are detected in create(), from the Review unique constraints.
         """
         request = self.context.get('request')
 
@@ -66,42 +75,14 @@ class ReviewSerializer(serializers.ModelSerializer):
             # If 'customer' is not in payload, it will be set from request.user in view/serializer.create
             if request.user.role != UserRole.CUSTOMER:
                  raise serializers.ValidationError("Only customers can submit reviews.")
-
-        # Prevent duplicate reviews (example: one review per customer per manufacturer)
-        # This logic might be more complex depending on whether order_id is considered.
-        # If order_id is null, this means one review per customer per manufacturer.
-        # If order_id is present, one review per customer per manufacturer per order.
-        # The current model allows multiple reviews if this isn't checked.
-
-        # For simplicity, let's check for one review per customer per manufacturer if no order_id.
-        # More complex logic might be needed if order_id is sometimes present.
-        # This check is primarily for creation (not self.instance).
-        if not self.instance:
-            customer = request.user if request else data.get('customer')
-            manufacturer = data.get('manufacturer')
-            order_id = data.get('order_id')
-
-            query = Review.objects.filter(customer=customer, manufacturer=manufacturer)
-            if order_id:
-                query = query.filter(order_id=order_id)
-            else:
-                # If creating a review without an order_id, check if a non-order-specific review already exists
-                query = query.filter(order_id__isnull=True)
-
-            if query.exists():
-                if order_id:
-                    raise serializers.ValidationError(
-                        "A review for this manufacturer and order already exists."
-                    )
-                else:
-                    raise serializers.ValidationError(
-                        "You have already submitted a review for this manufacturer (without a specific order reference)."
-                    )
         return data
 
     def create(self, validated_data):
         """
         Set customer from the request context if not already set by validation.
+        Duplicate reviews (one per customer per manufacturer per order, plus one general review
+        without an order) are rejected by the Review unique constraints rather than by a SELECT
+        before every INSERT.
         """
         if 'request' in self.context and not validated_data.get('customer'):
             validated_data['customer'] = self.context['request'].user
@@ -112,4 +93,48 @@ class ReviewSerializer(serializers.ModelSerializer):
              raise serializers.ValidationError({
                  "customer": "Reviews can only be submitted by Customer users."
              })
-        return super().create(validated_data)
+        return self._save_rejecting_duplicates(lambda: super(ReviewSerializer, self).create(validated_data),
+                                               validated_data.get('order_id'))
+
+    def update(self, instance, validated_data):
+        # Changing order_id can collide with another of the customer's reviews, e.g. clearing it when
+        # a general review for the same manufacturer already exists.
+        return self._save_rejecting_duplicates(lambda: super(ReviewSerializer, self).update(instance, validated_data),
+                                               validated_data.get('order_id', instance.order_id))
+
+    def _save_rejecting_duplicates(self, save, order_id):
+        """
+        Runs `save` in a savepoint (so the outer transaction stays usable) and turns a violation of
+        the Review unique constraints into a 400.
+        """
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"detail": "You have already submitted a review for this manufacturer " +
+                           ("for this order." if order_id else "(general review).")}
+            )
+
+
+class ReviewListSerializer(serializers.Serializer):
+    """
+    Read-only rendering of the `.values()` rows ReviewListCreateView lists, with the same output
+    as ReviewSerializer but without building a Review (and its related users) per row.
+    """
+    # Columns the rows must carry; the display names are annotated by reviews.views.with_display_names.
+    VALUE_FIELDS = (
+        'id', 'customer_id', 'customer_display_name', 'manufacturer_id', 'manufacturer_display_name',
+        'order_id', 'rating', 'comment', 'created_at', 'updated_at',
+    )
+
+    id = serializers.UUIDField(read_only=True)
+    customer = serializers.UUIDField(source='customer_id', read_only=True)
+    customer_display_name = serializers.CharField(read_only=True)
+    manufacturer = serializers.UUIDField(source='manufacturer_id', read_only=True)
+    manufacturer_display_name = serializers.CharField(read_only=True)
+    order_id = serializers.UUIDField(read_only=True, allow_null=True)
+    rating = serializers.IntegerField(read_only=True)
+    comment = serializers.CharField(read_only=True, allow_null=True)
+    created_at = serializers.DateTimeField(read_only=True)
+    updated_at = serializers.DateTimeField(read_only=True)
@@ -1,78 +1,104 @@
 import uuid
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 
 from accounts.models import User, UserRole
 from .models import Review
 
 class ReviewAPITests(APITestCase):
 
-    def setUp(self):
-        self.customer1 = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        # Created once per class; each test runs in a transaction that is rolled back.
+        cls.customer1 = User.objects.create_user(
             email="reviewer_customer1@example.com", password="Password123!",
             company_name="Reviewer One Corp", role=UserRole.CUSTOMER
         )
-        self.customer2 = User.objects.create_user(
+        cls.customer2 = User.objects.create_user(
             email="reviewer_customer2@example.com", password="Password123!",
             company_name="Reviewer Two Inc", role=UserRole.CUSTOMER
         )
-        self.manufacturer1 = User.objects.create_user(
+        cls.manufacturer1 = User.objects.create_user(
             email="reviewed_mf1@example.com", password="Password123!",
             company_name="Reviewed Manuf One", role=UserRole.MANUFACTURER
         )
         # Ensure Manufacturer profile exists if any related logic depends on it
         # from accounts.models import Manufacturer as ManufacturerProfile
-        # ManufacturerProfile.objects.get_or_create(user=self.manufacturer1)
+        # ManufacturerProfile.objects.get_or_create(user=cls.manufacturer1)
 
-        self.manufacturer2 = User.objects.create_user(
+        cls.manufacturer2 = User.objects.create_user(
             email="reviewed_mf2@example.com", password="Password123!",
             company_name="Reviewed Manuf Two", role=UserRole.MANUFACTURER
         )
-        # ManufacturerProfile.objects.get_or_create(user=self.manufacturer2)
+        # ManufacturerProfile.objects.get_or_create(user=cls.manufacturer2)
 
-        self.admin_user = User.objects.create_superuser(
+        cls.admin_user = User.objects.create_superuser(
             email="admin_reviews@example.com", password="Password123!", company_name="AdminReviewCo"
         )
 
-        self.review_c1_mf1 = Review.objects.create(
-            customer=self.customer1,
-            manufacturer=self.manufacturer1,
-            rating=5,
-            comment="Excellent service!"
-            # order_id=None by default
-        )
-        self.review_c2_mf1_order = Review.objects.create(
-            customer=self.customer2,
-            manufacturer=self.manufacturer1, # mf1 reviewed by two customers
-            rating=4,
-            comment="Good, but a bit slow.",
-            order_id=uuid.uuid4() # With an order_id
-        )
+        # One INSERT for both reviews; bulk_create still fills in the uuid pks and timestamps.
+        cls.review_c1_mf1, cls.review_c2_mf1_order = Review.objects.bulk_create([
+            Review(
+                customer=cls.customer1,
+                manufacturer=cls.manufacturer1,
+                rating=5,
+                comment="Excellent service!"
+                # order_id=None by default
+            ),
+            Review(
+                customer=cls.customer2,
+                manufacturer=cls.manufacturer1, # mf1 reviewed by two customers
+                rating=4,
+                comment="Good, but a bit slow.",
+                order_id=uuid.uuid4() # With an order_id
+            ),
+        ])
+
+        # URLs most tests hit, reversed once for the class
+        cls.mf1_review_list_url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': cls.manufacturer1.id})
+        cls.mf2_review_list_url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': cls.manufacturer2.id})
+        cls.review_c1_mf1_url = reverse('review_detail', kwargs={'id': cls.review_c1_mf1.id})
 
-    def _login(self, user_obj):
-        self.client.force_authenticate(user=user_obj)
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # One pre-authenticated client per principal, shared by every test in the class. They are
+        # built here rather than in setUpTestData so they aren't deep-copied for each test; no
+        # test changes their authentication or cookies.
+        cls.client_customer1 = cls._client_for(cls.customer1)
+        cls.client_customer2 = cls._client_for(cls.customer2)
+        cls.client_manufacturer1 = cls._client_for(cls.manufacturer1)
+        cls.client_admin = cls._client_for(cls.admin_user)
+
+    @staticmethod
+    def _client_for(user_obj):
+        client = APIClient()
+        client.force_authenticate(user=user_obj)
+        return client
 
     # --- Review Creation Tests (/api/manufacturers/{manufacturer_id}/reviews/) ---
     def test_customer_create_review_success(self):
-        self._login(self.customer1)
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer2.id})
+        url = self.mf2_review_list_url
         data = {"rating": 3, "comment": "Average experience.", "order_id": str(uuid.uuid4())}
-        response = self.client.post(url, data, format='json')
+        # Manufacturer lookup, then the INSERT inside a savepoint; the response reads no users.
+        with self.assertNumQueries(4):
+            response = self.client_customer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
         self.assertEqual(Review.objects.count(), 3)
         new_review = Review.objects.get(id=response.data['id'])
         self.assertEqual(new_review.customer, self.customer1)
         self.assertEqual(new_review.manufacturer, self.manufacturer2)
         self.assertEqual(new_review.rating, 3)
+        self.assertEqual(response.data['manufacturer_display_name'], "Reviewed Manuf Two")
 
     def test_customer_cannot_review_same_manufacturer_twice_no_orderid(self):
-        self._login(self.customer1)
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer1.id})
+        url = self.mf1_review_list_url
         data = {"rating": 2, "comment": "Trying to review again (no order_id)."}
-        response = self.client.post(url, data, format='json')
+        response = self.client_customer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
-        # Message comes from serializer's validate method or view's perform_create check
+        # Message comes from ReviewSerializer.create when the unique constraint rejects the INSERT
         self.assertTrue(
             "already submitted a review" in response.data.get("detail", "") or \
             any("already submitted a review" in e for e in response.data.get("non_field_errors", [])) or \
@@ -81,24 +107,23 @@ class ReviewAPITests(APITestCase):
 
 
     def test_customer_can_review_same_manufacturer_with_different_orderid(self):
-        self._login(self.customer1)
         # self.review_c1_mf1 was created without order_id in setUp for manufacturer1
         # Now, create a new review for manufacturer1 WITH an order_id
         order_id_for_new_review = uuid.uuid4()
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer1.id})
+        url = self.mf1_review_list_url
         data = {"rating": 4, "comment": "Review for a specific order.", "order_id": str(order_id_for_new_review)}
-        response = self.client.post(url, data, format='json')
+        response = self.client_customer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
         self.assertTrue(Review.objects.filter(customer=self.customer1, manufacturer=self.manufacturer1, order_id=order_id_for_new_review).exists())
 
     def test_customer_cannot_review_same_order_twice(self):
-        self._login(self.customer2) # customer2 made review_c2_mf1_order in setUp
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer1.id})
+        url = self.mf1_review_list_url
         data = {
             "rating": 3, "comment": "Trying to review same order again.",
             "order_id": str(self.review_c2_mf1_order.order_id)
         }
-        response = self.client.post(url, data, format='json')
+        # customer2 made review_c2_mf1_order in setUpTestData
+        response = self.client_customer2.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
         self.assertTrue(
             "already submitted a review" in response.data.get("detail", "") or \
@@ -108,94 +133,150 @@ class ReviewAPITests(APITestCase):
 
 
     def test_create_review_invalid_rating(self):
-        self._login(self.customer1)
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer2.id})
+        url = self.mf2_review_list_url
         data_low = {"rating": 0, "comment": "Rating too low."}
-        response_low = self.client.post(url, data_low, format='json')
+        response_low = self.client_customer1.post(url, data_low, format='json')
         self.assertEqual(response_low.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("rating", response_low.data)
 
         data_high = {"rating": 6, "comment": "Rating too high."}
-        response_high = self.client.post(url, data_high, format='json')
+        response_high = self.client_customer1.post(url, data_high, format='json')
         self.assertEqual(response_high.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("rating", response_high.data)
 
+    def test_rating_range_enforced_by_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Review.objects.create(customer=self.customer1, manufacturer=self.manufacturer2, rating=6)
+
     def test_manufacturer_cannot_create_review(self):
-        self._login(self.manufacturer1)
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer2.id})
+        url = self.mf2_review_list_url
         data = {"rating": 5, "comment": "MF reviewing MF"}
-        response = self.client.post(url, data, format='json')
+        response = self.client_manufacturer1.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     # --- Review Listing Tests (/api/manufacturers/{manufacturer_id}/reviews/) ---
     def test_list_reviews_for_manufacturer_public(self):
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer1.id})
-        response = self.client.get(url, format='json')
+        url = self.mf1_review_list_url
+        # The reviews and both display names come back in a single query.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        review_ids_in_response = {uuid.UUID(item['id']) for item in response.data}
+        self.assertEqual(len(response.data['results']), 2)
+        review_ids_in_response = {uuid.UUID(item['id']) for item in response.data['results']}
         self.assertIn(self.review_c1_mf1.id, review_ids_in_response)
         self.assertIn(self.review_c2_mf1_order.id, review_ids_in_response)
 
-    def test_list_reviews_for_manufacturer_with_no_reviews(self):
-        url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': self.manufacturer2.id})
+    def test_list_reviews_display_names(self):
+        self.customer2.company_name = "" # Falls back to email
+        self.customer2.save()
+        url = self.mf1_review_list_url
         response = self.client.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        names = {uuid.UUID(item['id']): (item['customer_display_name'], item['manufacturer_display_name']) for item in response.data['results']}
+        self.assertEqual(names[self.review_c1_mf1.id], ("Reviewer One Corp", "Reviewed Manuf One"))
+        self.assertEqual(names[self.review_c2_mf1_order.id], ("reviewer_customer2@example.com", "Reviewed Manuf One"))
+
+    def test_list_reviews_matches_detail_representation(self):
+        list_response = self.client.get(self.mf1_review_list_url, format='json')
+        detail_response = self.client.get(self.review_c1_mf1_url, format='json')
+        listed = next(item for item in list_response.json()['results'] if item['id'] == str(self.review_c1_mf1.id))
+        self.assertEqual(listed, detail_response.json())
+
+    def test_list_reviews_for_manufacturer_with_no_reviews(self):
+        url = self.mf2_review_list_url
+        # An empty page adds the manufacturer existence check.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_list_reviews_is_paginated(self):
+        Review.objects.bulk_create([
+            Review(customer=self.customer1, manufacturer=self.manufacturer1, rating=3, order_id=uuid.uuid4())
+            for _ in range(25)
+        ])
+        url = self.mf1_review_list_url
+        first_page = self.client.get(url, format='json')
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first_page.data['results']), 25)
+        self.assertNotIn('count', first_page.data)
+        self.assertIsNotNone(first_page.data['next'])
+
+        second_page = self.client.get(first_page.data['next'], format='json')
+        self.assertEqual(second_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second_page.data['results']), 2)
+        self.assertIsNone(second_page.data['next'])
+        seen = {item['id'] for item in first_page.data['results'] + second_page.data['results']}
+        self.assertEqual(len(seen), 27)
+
+    def test_list_reviews_for_unknown_manufacturer_not_found(self):
+        for manufacturer_id in (uuid.uuid4(), self.customer1.id):
+            url = reverse('manufacturer_review_list_create', kwargs={'manufacturer_id': manufacturer_id})
+            response = self.client.get(url, format='json')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     # --- Review Detail Tests (/api/reviews/{review_id}/) ---
     def test_retrieve_review_detail_public(self):
-        url = reverse('review_detail', kwargs={'id': self.review_c1_mf1.id})
-        response = self.client.get(url, format='json')
+        url = self.review_c1_mf1_url
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(uuid.UUID(response.data['id']), self.review_c1_mf1.id)
         self.assertEqual(response.data['comment'], self.review_c1_mf1.comment)
 
     # --- Review Update Tests (/api/reviews/{review_id}/) ---
     def test_review_owner_can_update_review(self):
-        self._login(self.customer1)
-        url = reverse('review_detail', kwargs={'id': self.review_c1_mf1.id})
+        url = self.review_c1_mf1_url
         update_data = {"rating": 4, "comment": "Updated comment."}
-        response = self.client.patch(url, update_data, format='json')
+        # Load, then the UPDATE inside a savepoint; the ownership check compares customer_id without loading the customer.
+        with self.assertNumQueries(4):
+            response = self.client_customer1.patch(url, update_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
         self.review_c1_mf1.refresh_from_db()
         self.assertEqual(self.review_c1_mf1.rating, 4)
         self.assertEqual(self.review_c1_mf1.comment, "Updated comment.")
 
+    def test_update_review_into_duplicate_rejected(self):
+        # customer1 already has a general review for manufacturer1; clearing this one's order_id would make a second.
+        order_review = Review.objects.create(
+            customer=self.customer1, manufacturer=self.manufacturer1, rating=3, order_id=uuid.uuid4()
+        )
+        url = reverse('review_detail', kwargs={'id': order_review.id})
+        response = self.client_customer1.patch(url, {"order_id": None}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertIn("already submitted a review", response.data["detail"])
+        order_review.refresh_from_db()
+        self.assertIsNotNone(order_review.order_id)
+
     def test_non_owner_cannot_update_review(self):
-        self._login(self.customer2)
-        url = reverse('review_detail', kwargs={'id': self.review_c1_mf1.id})
+        url = self.review_c1_mf1_url
         update_data = {"comment": "Attempted update by non-owner."}
-        response = self.client.patch(url, update_data, format='json')
+        response = self.client_customer2.patch(url, update_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     def test_manufacturer_cannot_update_review_about_them(self):
-        self._login(self.manufacturer1)
-        url = reverse('review_detail', kwargs={'id': self.review_c1_mf1.id})
+        url = self.review_c1_mf1_url
         update_data = {"comment": "Manufacturer trying to edit review."}
-        response = self.client.patch(url, update_data, format='json')
+        response = self.client_manufacturer1.patch(url, update_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
 
     # --- Review Deletion Tests (/api/reviews/{review_id}/) ---
     def test_review_owner_can_delete_review(self):
-        self._login(self.customer1)
         review_id_to_delete = self.review_c1_mf1.id
-        url = reverse('review_detail', kwargs={'id': review_id_to_delete})
-        response = self.client.delete(url, format='json')
+        url = self.review_c1_mf1_url
+        response = self.client_customer1.delete(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Review.objects.filter(id=review_id_to_delete).exists())
 
     def test_non_owner_cannot_delete_review(self):
-        self._login(self.customer2)
-        url = reverse('review_detail', kwargs={'id': self.review_c1_mf1.id})
-        response = self.client.delete(url, format='json')
+        url = self.review_c1_mf1_url
+        response = self.client_customer2.delete(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertTrue(Review.objects.filter(id=self.review_c1_mf1.id).exists())
 
     def test_admin_can_delete_any_review(self):
-        self._login(self.admin_user)
         review_id_to_delete = self.review_c1_mf1.id
-        url = reverse('review_detail', kwargs={'id': review_id_to_delete})
-        response = self.client.delete(url, format='json')
+        url = self.review_c1_mf1_url
+        response = self.client_admin.delete(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Review.objects.filter(id=review_id_to_delete).exists())
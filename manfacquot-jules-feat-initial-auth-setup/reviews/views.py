@@ -1,9 +1,15 @@
-from rest_framework import generics, permissions, serializers
-from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions
+from django.db.models import CharField, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.http import Http404
 from .models import Review
-from .serializers import ReviewSerializer
+from .pagination import ReviewPagination
+from .serializers import ReviewListSerializer, ReviewSerializer
 from accounts.models import User, UserRole # Assuming UserRole is here
 
+# Read-only HTTP methods, as a frozenset for the membership tests below.
+_SAFE_METHODS = frozenset(permissions.SAFE_METHODS)
+
 # --- Custom Permissions for Reviews ---
 
 class CanCreateReviewForManufacturer(permissions.BasePermission):
@@ -25,18 +31,24 @@ class CanCreateReviewForManufacturer(permissions.BasePermission):
             self.message = "Manufacturer ID not provided in URL."
             return False
 
-        try:
-            # Ensure the manufacturer_id from URL corresponds to an actual manufacturer
-            manufacturer_user = User.objects.get(pk=manufacturer_id_from_url, role=UserRole.MANUFACTURER)
-        except User.DoesNotExist:
+        # Ensure the manufacturer_id from URL corresponds to an actual manufacturer. The customer's
+        # role is already on request.user, so this is the only query; it reads just the values
+        # the create response (manufacturer_display_name) needs.
+        manufacturer_row = User.objects.filter(
+            pk=manufacturer_id_from_url, role=UserRole.MANUFACTURER
+        ).values_list('company_name', 'email').first()
+        if manufacturer_row is None:
             self.message = "Manufacturer to be reviewed not found or is not a valid manufacturer."
             return False
 
         # A customer cannot be a manufacturer, so request.user != manufacturer_user is implicitly true.
         # If a user could have multiple roles, this check would be more important:
-        # if request.user.id == manufacturer_user.id:
+        # if request.user.id == manufacturer_id:
         # self.message = "Users cannot review themselves."
         # return False
+        # Kept on the view for ReviewListCreateView.perform_create, instead of fetching the manufacturer again.
+        company_name, email = manufacturer_row
+        view.manufacturer_display_name = company_name or email
         return True
 
 class IsReviewOwnerOrReadOnly(permissions.BasePermission):
@@ -48,21 +60,49 @@ class IsReviewOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj): # obj is a Review instance
         # Read permissions are allowed for any request,
         # so we'll always allow GET, HEAD or OPTIONS requests.
-        if request.method in permissions.SAFE_METHODS:
+        if request.method in _SAFE_METHODS:
             return True
 
         # Write permissions are only allowed to the owner of the review or staff.
-        return request.user.is_staff or obj.customer == request.user
+        # Compared by id: customer_id is on the row, so this never loads the customer.
+        return request.user.is_staff or obj.customer_id == request.user.id
 
 
 # --- API Views for Reviews ---
 
+def with_display_names(queryset):
+    """
+    Annotates customer_display_name/manufacturer_display_name (company_name, or email if blank)
+    in SQL, so ReviewSerializer reads them as plain attributes instead of per-row Python.
+    """
+    return queryset.annotate(
+        customer_display_name=Coalesce(
+            NullIf('customer__company_name', Value('')), 'customer__email', output_field=CharField()
+        ),
+        manufacturer_display_name=Coalesce(
+            NullIf('manufacturer__company_name', Value('')), 'manufacturer__email', output_field=CharField()
+        ),
+    )
+
 class ReviewListCreateView(generics.ListCreateAPIView):
     """
     GET /api/manufacturers/{manufacturer_id}/reviews/ - List reviews for a specific manufacturer. (Public)
     POST /api/manufacturers/{manufacturer_id}/reviews/ - Create a review for a specific manufacturer (by a customer).
     """
     serializer_class = ReviewSerializer
+    pagination_class = ReviewPagination
+
+    def initial(self, request, *args, **kwargs):
+        # The URL converter has already parsed the id into a UUID; read it once, before the
+        # permission checks, for get_queryset/list/perform_create.
+        self.manufacturer_id = kwargs['manufacturer_id']
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer_class(self):
+        # Listing renders plain .values() rows (see get_queryset); creating still goes through ReviewSerializer.
+        if self.request.method in _SAFE_METHODS:
+            return ReviewListSerializer
+        return ReviewSerializer
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -72,39 +112,28 @@ class ReviewListCreateView(generics.ListCreateAPIView):
         return [permissions.AllowAny()]
 
     def get_queryset(self):
-        manufacturer_id = self.kwargs.get('manufacturer_id')
-        # Ensure manufacturer exists and is valid (role check), or let it 404
-        manufacturer = get_object_or_404(User, pk=manufacturer_id, role=UserRole.MANUFACTURER)
-        return Review.objects.filter(manufacturer=manufacturer).select_related('customer', 'manufacturer').order_by('-created_at')
+        # The FK column is filtered by the URL id directly; whether that id is a real manufacturer
+        # is only checked (in list()) when no reviews come back. ReviewPagination orders by -created_at.
+        # Rows are dicts rather than Review instances, so no model is built per review.
+        return with_display_names(
+            Review.objects.filter(manufacturer_id=self.manufacturer_id)
+        ).values(*ReviewListSerializer.VALUE_FIELDS)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if not response.data['results'] and not User.objects.filter(
+            pk=self.manufacturer_id, role=UserRole.MANUFACTURER
+        ).exists():
+            raise Http404("No manufacturer matches the given query.")
+        return response
 
     def perform_create(self, serializer):
-        manufacturer_id = self.kwargs.get('manufacturer_id')
-        manufacturer = get_object_or_404(User, pk=manufacturer_id, role=UserRole.MANUFACTURER) # Already validated by permission
-
-        # Prevent duplicate reviews (this logic is also in serializer, good for defense in depth)
-        order_id = serializer.validated_data.get('order_id')
-
-        # Check for existing review by this customer for this manufacturer (and optionally order)
-        # This is an example, the exact definition of "duplicate" might vary.
-        # The serializer's validate method already has a similar check.
-        # If it's preferred to keep this logic solely in serializer, this block can be simplified/removed.
-        existing_review_query = Review.objects.filter(
-            customer=self.request.user,
-            manufacturer=manufacturer
-        )
-        if order_id:
-            existing_review_query = existing_review_query.filter(order_id=order_id)
-        else: # If new review has no order_id, check against existing reviews with no order_id
-            existing_review_query = existing_review_query.filter(order_id__isnull=True)
-
-        if existing_review_query.exists():
-            raise serializers.ValidationError(
-                {"detail": "You have already submitted a review for this manufacturer " +
-                           ("for this order." if order_id else "(general review).")}
-            )
-
-        serializer.save(customer=self.request.user, manufacturer=manufacturer)
-
+        # CanCreateReviewForManufacturer (always checked for POST) has already validated the
+        # manufacturer and left its display name on the view; duplicates are rejected by
+        # ReviewSerializer.create. Setting the display name plays the part of the with_display_names()
+        # annotation, so the response doesn't load the manufacturer.
+        review = serializer.save(customer=self.request.user, manufacturer_id=self.manufacturer_id)
+        review.manufacturer_display_name = self.manufacturer_display_name
 
 class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -112,7 +141,8 @@ class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     PUT/PATCH /api/reviews/{review_id}/ - Update a review (by owner or admin).
     DELETE /api/reviews/{review_id}/ - Delete a review (by owner or admin).
     """
-    queryset = Review.objects.select_related('customer', 'manufacturer').all()
+    # No select_related: display names are annotated and IsReviewOwnerOrReadOnly only reads customer_id.
+    queryset = with_display_names(Review.objects.all())
     serializer_class = ReviewSerializer
     permission_classes = [IsReviewOwnerOrReadOnly] # Handles both read (any) and write (owner/admin)
     lookup_field = 'id' # Review model PK is 'id'